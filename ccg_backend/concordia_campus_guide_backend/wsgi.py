@@ -16,3 +16,8 @@ os.environ.setdefault(
 )
 
 application = get_wsgi_application()
+
+# servers (runserver included) import this module, management commands never do
+from mapengine.utils.indoor_map_registry import setup_indoor_maps  # noqa: E402
+
+setup_indoor_maps()
@@ -7,6 +7,92 @@ OTP_BASE_URL = config("OTP_BASE_URL", default=os.getenv("OTP_BASE_URL"))
 OTP_HEADER = {"Content-Type": "application/json"}
 OTP_AVG_WALKING_SPEED = 1.385
 
+# Shared HTTP client of the ORS/OTP calls: timeouts in seconds (connect, read),
+# retries of failed idempotent requests with jittered exponential backoff, and pooled
+# keep-alive connections (hosts kept, connections per host)
+UPSTREAM_CONNECT_TIMEOUT = config("UPSTREAM_CONNECT_TIMEOUT", default=3.05, cast=float)
+UPSTREAM_READ_TIMEOUT = config("UPSTREAM_READ_TIMEOUT", default=10.0, cast=float)
+UPSTREAM_MAX_RETRIES = config("UPSTREAM_MAX_RETRIES", default=2, cast=int)
+UPSTREAM_RETRY_BACKOFF = config("UPSTREAM_RETRY_BACKOFF", default=0.1, cast=float)
+UPSTREAM_POOL_CONNECTIONS = config("UPSTREAM_POOL_CONNECTIONS", default=4, cast=int)
+UPSTREAM_POOL_MAXSIZE = config("UPSTREAM_POOL_MAXSIZE", default=16, cast=int)
+# Most connections the async client keeps open at once, in-flight requests included
+UPSTREAM_ASYNC_MAX_CONNECTIONS = config(
+    "UPSTREAM_ASYNC_MAX_CONNECTIONS", default=256, cast=int
+)
+# Outdoor directions cache: "local" (in-process LRU of DIRECTIONS_CACHE_MAX_BYTES),
+# "django" (the Django cache named by DIRECTIONS_CACHE_LOCATION, default "default"),
+# "file" (a directory at DIRECTIONS_CACHE_LOCATION) or "none"
+DIRECTIONS_CACHE_BACKEND = config("DIRECTIONS_CACHE_BACKEND", default="local")
+DIRECTIONS_CACHE_LOCATION = config("DIRECTIONS_CACHE_LOCATION", default="")
+DIRECTIONS_CACHE_MAX_BYTES = config(
+    "DIRECTIONS_CACHE_MAX_BYTES", default=32 * 1024 * 1024, cast=int
+)
+# Start/end coordinates are snapped to a grid of this many meters before lookup
+DIRECTIONS_CACHE_GRID_METERS = config(
+    "DIRECTIONS_CACHE_GRID_METERS", default=5.0, cast=float
+)
+# Seconds a route stays cached, per profile ("profile=seconds,..."; 0 disables caching)
+DIRECTIONS_CACHE_TTLS = config(
+    "DIRECTIONS_CACHE_TTLS",
+    default="foot-walking=86400,cycling-regular=86400,wheelchair=86400,"
+    "driving-car=3600,public-transport=60",
+)
+# Identical outdoor direction requests in flight share one upstream call
+DIRECTIONS_SINGLE_FLIGHT = config("DIRECTIONS_SINGLE_FLIGHT", default=True, cast=bool)
+# Seconds allowed for all the concurrently fetched legs of a shuttle route
+SHUTTLE_DIRECTIONS_DEADLINE = config(
+    "SHUTTLE_DIRECTIONS_DEADLINE", default=15.0, cast=float
+)
+
+# Seconds between checks of the IndoorMaps files for edits (negative disables them)
+INDOOR_MAPS_CHECK_INTERVAL = config(
+    "INDOOR_MAPS_CHECK_INTERVAL", default=2.0, cast=float
+)
+# Cost of changing floors / walking between buildings, in indoor map units (pixels)
+INDOOR_VERTICAL_TRANSITION_COST = config(
+    "INDOOR_VERTICAL_TRANSITION_COST", default=100.0, cast=float
+)
+INDOOR_OUTSIDE_TRANSITION_COST = config(
+    "INDOOR_OUTSIDE_TRANSITION_COST", default=0.0, cast=float
+)
+# Floors whose all-pairs route tables would exceed this size use online search instead;
+# the default (~145 nodes) keeps compiling a floor on a request thread to milliseconds,
+# `compile_indoor_maps --all-pairs-max-bytes` builds bigger tables offline
+INDOOR_ALL_PAIRS_MAX_BYTES = config(
+    "INDOOR_ALL_PAIRS_MAX_BYTES", default=128 * 1024, cast=int
+)
+# Output of `manage.py compile_indoor_maps` (empty: next to the IndoorMaps files)
+INDOOR_MAPS_ARTIFACT = config("INDOOR_MAPS_ARTIFACT", default="")
+# Memory budget of the cached indoor route responses (0 disables the cache)
+INDOOR_DIRECTIONS_CACHE_MAX_BYTES = config(
+    "INDOOR_DIRECTIONS_CACHE_MAX_BYTES", default=16 * 1024 * 1024, cast=int
+)
+# Memory budget of the rendered single-floor route segments (0 disables the cache)
+INDOOR_SEGMENT_CACHE_MAX_BYTES = config(
+    "INDOOR_SEGMENT_CACHE_MAX_BYTES", default=4 * 1024 * 1024, cast=int
+)
+# Most routes accepted by one indoor batch request
+INDOOR_DIRECTIONS_BATCH_MAX = config(
+    "INDOOR_DIRECTIONS_BATCH_MAX", default=100, cast=int
+)
+# Most facilities returned by one indoor nearest-facility request
+INDOOR_NEAREST_MAX_RESULTS = config("INDOOR_NEAREST_MAX_RESULTS", default=10, cast=int)
+# Most alternative indoor routes per request and the time spent looking for them
+INDOOR_ALTERNATIVES_MAX = config("INDOOR_ALTERNATIVES_MAX", default=3, cast=int)
+INDOOR_ALTERNATIVES_TIME_BUDGET = config(
+    "INDOOR_ALTERNATIVES_TIME_BUDGET", default=0.05, cast=float
+)
+# Load and compile the indoor maps when a server process (WSGI/ASGI) starts instead of
+# on first request
+INDOOR_MAPS_PRELOAD = config("INDOOR_MAPS_PRELOAD", default=True, cast=bool)
+# Reload edited IndoorMaps files from a background thread polling every N seconds,
+# requests then never check the files themselves
+INDOOR_MAPS_WATCH = config("INDOOR_MAPS_WATCH", default=False, cast=bool)
+INDOOR_MAPS_WATCH_INTERVAL = config(
+    "INDOOR_MAPS_WATCH_INTERVAL", default=1.0, cast=float
+)
+
 
 def otp_query(start, end, wheelchair_accessible, num_trip_patterns):
     return {
@@ -1,5 +1,8 @@
 from .exceptions import (
     BuildingNotFoundError,
+    IndoorMapArtifactError,
+    IndoorMapRenderError,
     InvalidCoordinatesError,
+    RoomNotFoundError,
     ShuttleStopNotFoundError,
 )
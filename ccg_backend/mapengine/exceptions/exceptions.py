@@ -22,3 +22,27 @@ class ShuttleStopNotFoundError(Exception):
     def __init__(self, message="Shuttle stop not found for one or both campuses."):
         self.message = message
         super().__init__(self.message)
+
+
+class IndoorMapArtifactError(Exception):
+    """Exception raised when a compiled indoor maps artifact can't be used."""
+
+    def __init__(self, message="Invalid compiled indoor maps artifact."):
+        self.message = message
+        super().__init__(self.message)
+
+
+class IndoorMapRenderError(Exception):
+    """Exception raised when a route found on an indoor map can't be drawn."""
+
+    def __init__(self, message="The route can't be drawn on the indoor map."):
+        self.message = message
+        super().__init__(self.message)
+
+
+class RoomNotFoundError(Exception):
+    """Exception raised when a room ID isn't on any indoor map."""
+
+    def __init__(self, message="Room not found on any indoor map."):
+        self.message = message
+        super().__init__(self.message)
@@ -0,0 +1,110 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mapengine.constants import INDOOR_ALL_PAIRS_MAX_BYTES, INDOOR_MAPS_ARTIFACT
+from mapengine.utils.indoor_graph import FloorGraph
+from mapengine.utils.indoor_map_artifact import (
+    ARTIFACT_NAME,
+    source_digest,
+    write_artifact,
+)
+from mapengine.utils.indoor_map_registry import FLOOR_CONNECTION_GRAPH, INDOOR_MAPS_DIR
+from mapengine.utils.indoor_map_validation import (
+    ERROR,
+    validate_floor,
+    validate_floor_connection_graph,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Validates the IndoorMaps files and compiles them, with their search tables, "
+        "into the artifact loaded by the workers at startup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--maps-dir", default=str(INDOOR_MAPS_DIR))
+        parser.add_argument(
+            "--output",
+            default=INDOOR_MAPS_ARTIFACT or None,
+            help=f"Artifact path (default: <maps-dir>/{ARTIFACT_NAME})",
+        )
+        parser.add_argument(
+            "--all-pairs-max-bytes",
+            type=int,
+            default=INDOOR_ALL_PAIRS_MAX_BYTES,
+            help="Largest all-pairs route tables built per floor; the artifact keeps "
+            "them, so bigger floors than the workers would compile can use tables",
+        )
+        parser.add_argument(
+            "--check", action="store_true", help="Only validate, write nothing"
+        )
+        parser.add_argument(
+            "--strict", action="store_true", help="Fail on warnings as well"
+        )
+
+    def handle(self, *args, **options):
+        maps_dir = Path(options["maps_dir"])
+        output = Path(options["output"] or maps_dir / ARTIFACT_NAME)
+
+        sources = {}
+        for path in sorted(maps_dir.glob("*.json")):
+            content = path.read_bytes()
+            try:
+                sources[path.stem] = (json.loads(content), content)
+            except json.JSONDecodeError as e:
+                raise CommandError(f"{path.name} is not valid JSON: {e}")
+        if not sources:
+            raise CommandError(f"No IndoorMaps files found in {maps_dir}")
+
+        floors = {
+            name: data
+            for name, (data, _) in sources.items()
+            if name != FLOOR_CONNECTION_GRAPH
+        }
+        issues = []
+        for name, nodes in floors.items():
+            issues.extend(validate_floor(name, nodes))
+        if FLOOR_CONNECTION_GRAPH in sources:
+            issues.extend(
+                validate_floor_connection_graph(
+                    sources[FLOOR_CONNECTION_GRAPH][0], floors
+                )
+            )
+
+        for issue in issues:
+            if issue.severity == ERROR or options["verbosity"] >= 2:
+                node = f" {issue.node}" if issue.node else ""
+                self.stderr.write(
+                    f"{issue.severity}: {issue.floor}{node}: {issue.message}"
+                )
+        errors = sum(issue.severity == ERROR for issue in issues)
+        warnings = len(issues) - errors
+        self.stdout.write(
+            f"{len(sources)} files checked, {errors} errors, {warnings} warnings"
+        )
+        if errors or (options["strict"] and warnings):
+            raise CommandError("Indoor maps failed validation")
+        if options["check"]:
+            return
+
+        graphs = {}
+        for name, (data, content) in sources.items():
+            graphs[name] = FloorGraph.from_json(
+                name, data, source_digest(content), options["all_pairs_max_bytes"]
+            )
+            usage = graphs[name].memory_usage()
+            self.stdout.write(
+                f"  {name}: {usage['nodes']} nodes, {usage['edges']} edges, "
+                f"{usage['total_bytes']} bytes"
+                + ("" if usage["uses_all_pairs"] else " (no all-pairs tables)")
+            )
+        meta = write_artifact(output, graphs)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {output} (format {meta['version']}, "
+                f"checksum {meta['checksum'][:12]})"
+            )
+        )
@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+import httpx
+from asgiref.sync import async_to_sync
+
+from ..utils import async_direction_api_utils
+from ..utils.async_direction_api_utils import (
+    fetch_ors_legs_async,
+    get_async_client,
+    ors_directions_async,
+)
+
+SHUTTLE_LEGS = {
+    "walk_to_stop": ("a", "b", "foot-walking"),
+    "shuttle_ride": ("b", "c", "driving-car"),
+    "walk_from_stop": ("c", "d", "foot-walking"),
+}
+
+
+def fake_ors_directions(delays, codes, cancelled=None):
+    async def ors_directions(start, end, profile):
+        try:
+            await asyncio.sleep(delays.get(start, 0))
+        except asyncio.CancelledError:
+            cancelled.append(start)
+            raise
+        return {"start": start}, codes.get(start, 200)
+
+    return ors_directions
+
+
+def test_fetch_ors_legs_async_runs_legs_concurrently(monkeypatch):
+    monkeypatch.setattr(
+        async_direction_api_utils,
+        "ors_directions_async",
+        fake_ors_directions({"a": 0.2, "b": 0.2, "c": 0.2}, {}),
+    )
+    started = time.monotonic()
+    responses = asyncio.run(fetch_ors_legs_async(SHUTTLE_LEGS, deadline=5))
+    assert time.monotonic() - started < 0.5
+    assert responses == {
+        "walk_to_stop": ({"start": "a"}, 200),
+        "shuttle_ride": ({"start": "b"}, 200),
+        "walk_from_stop": ({"start": "c"}, 200),
+    }
+
+
+def test_fetch_ors_legs_async_cancels_legs_after_a_failure(monkeypatch):
+    cancelled = []
+    # leg 3 fails first, leg 1 fails later and is still waited for
+    monkeypatch.setattr(
+        async_direction_api_utils,
+        "ors_directions_async",
+        fake_ors_directions({"a": 0.1, "b": 5}, {"a": 400, "c": 500}, cancelled),
+    )
+    started = time.monotonic()
+    responses = asyncio.run(fetch_ors_legs_async(SHUTTLE_LEGS, deadline=10))
+    assert time.monotonic() - started < 1
+    assert responses["walk_to_stop"] == ({"start": "a"}, 400)
+    assert "shuttle_ride" not in responses
+    assert cancelled == ["b"]
+
+
+def test_fetch_ors_legs_async_cancels_legs_at_the_deadline(monkeypatch):
+    cancelled = []
+    monkeypatch.setattr(
+        async_direction_api_utils,
+        "ors_directions_async",
+        fake_ors_directions({"b": 5}, {}, cancelled),
+    )
+    responses = asyncio.run(fetch_ors_legs_async(SHUTTLE_LEGS, deadline=0.2))
+    assert set(responses) == {"walk_to_stop", "walk_from_stop"}
+    assert cancelled == ["b"]
+
+
+def mock_client(handler):
+    async def get_async_client():
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    return get_async_client
+
+
+def test_ors_directions_async_maps_transport_errors(monkeypatch):
+    def handler(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    monkeypatch.setattr(
+        async_direction_api_utils,
+        "get_async_client",
+        mock_client(handler),
+    )
+    route_info, code = asyncio.run(ors_directions_async("1,2", "3,4", "foot-walking"))
+    assert code == 504
+    assert route_info["error"] == "Failed to get directions"
+
+
+def test_ors_directions_async_reports_gateway_pages_as_bad_gateway(monkeypatch):
+    def handler(request):
+        return httpx.Response(502, text="<html>502 Bad Gateway</html>")
+
+    monkeypatch.setattr(async_direction_api_utils, "ORS_BASE_URL", "http://ors")
+    monkeypatch.setattr(
+        async_direction_api_utils,
+        "get_async_client",
+        mock_client(handler),
+    )
+    route_info, code = asyncio.run(ors_directions_async("1,2", "3,4", "foot-walking"))
+    assert code == 502
+    assert route_info["ors_error"] == "ORS answered 502 with a body that isn't JSON"
+
+
+def test_async_clients_are_per_event_loop():
+    async def same_loop():
+        return await get_async_client() is await get_async_client()
+
+    assert asyncio.run(same_loop())
+    assert asyncio.run(get_async_client()) is not asyncio.run(get_async_client())
+
+
+def test_async_clients_are_closed_with_their_loop():
+    clients = []
+
+    async def request():
+        clients.append(await get_async_client())
+        assert not clients[-1].is_closed
+
+    # a loop per call, like Django running an async view under WSGI
+    asyncio.run(request())
+    async_to_sync(request)()
+    assert len(clients) == 2
+    assert all(client.is_closed for client in clients)
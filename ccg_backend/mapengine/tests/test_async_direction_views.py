@@ -0,0 +1,108 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from django.contrib.gis.geos import Point
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from mapengine.models.building import Building
+from mapengine.models.shuttle import ShuttleStop
+from mapengine.utils.directions_cache import directions_cache
+
+MOCK_ROUTE = {"total_distance": 100.0, "total_duration": 60.0, "steps": []}
+
+
+@pytest.fixture(autouse=True)
+def clear_directions_cache():
+    """Routes cached by one test must not answer the mocked upstream of another."""
+    directions_cache.clear()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def setup_test_data():
+    Building.objects.create(
+        name="Hall Building", location=Point(-73.579, 45.4973), campus="SGW"
+    )
+    Building.objects.create(
+        name="Vanier Library", location=Point(-73.638, 45.459), campus="LOY"
+    )
+    ShuttleStop.objects.create(name="SGW", latitude=45.4971, longitude=-73.5785)
+    ShuttleStop.objects.create(name="LOY", latitude=45.4590, longitude=-73.6384)
+
+
+@pytest.mark.django_db
+@patch(
+    "mapengine.utils.async_direction_api_utils.ors_directions_async",
+    new_callable=AsyncMock,
+    return_value=(MOCK_ROUTE, 200),
+)
+def test_async_directions(mock_ors, api_client):
+    url = reverse("async-directions", args=["foot-walking"])
+    response = api_client.get(
+        url, {"start": "-73.579,45.4973", "end": "-73.5783,45.4955"}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == MOCK_ROUTE
+    mock_ors.assert_awaited_once_with(
+        "-73.579,45.4973", "-73.5783,45.4955", "foot-walking"
+    )
+
+    # a few meters away, answered from directions_cache
+    response = api_client.get(
+        url, {"start": "-73.579001,45.497301", "end": "-73.5783,45.4955"}
+    )
+    assert response.json() == MOCK_ROUTE
+    assert mock_ors.await_count == 1
+
+
+@pytest.mark.django_db
+def test_async_directions_bad_requests(api_client):
+    url = reverse("async-directions", args=["teleport"])
+    assert api_client.get(url, {"start": "0,0", "end": "1,1"}).status_code == 404
+
+    url = reverse("async-directions", args=["foot-walking"])
+    response = api_client.get(url)
+    assert response.status_code == 400
+    assert response.json() == {"error": "Missing start or end parameter"}
+
+
+@pytest.mark.django_db(transaction=True)
+@patch(
+    "mapengine.utils.async_direction_api_utils.ors_directions_async",
+    new_callable=AsyncMock,
+    return_value=(MOCK_ROUTE, 200),
+)
+def test_async_shuttle_directions(mock_ors, api_client, setup_test_data):
+    url = reverse("async-directions", args=["concordia-shuttle"])
+    response = api_client.get(
+        url, {"start": "-73.579,45.4973", "end": "-73.638,45.459"}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert list(data["legs"]) == ["walk_to_stop", "shuttle_ride", "walk_from_stop"]
+    assert data["total_duration"] == 180.0
+    assert (data["origin_campus"], data["destination_campus"]) == ("SGW", "LOY")
+    assert mock_ors.await_count == 3
+
+
+@pytest.mark.django_db(transaction=True)
+@patch(
+    "mapengine.utils.async_direction_api_utils.ors_directions_async",
+    new_callable=AsyncMock,
+    return_value=({}, 500),
+)
+def test_async_shuttle_directions_api_failure(mock_ors, api_client, setup_test_data):
+    url = reverse("async-directions", args=["concordia-shuttle"])
+    response = api_client.get(
+        url, {"start": "-73.579,45.4973", "end": "-73.638,45.459"}
+    )
+
+    assert response.status_code == 500
+    assert response.json() == {"error": "Error fetching walking directions for leg 1."}
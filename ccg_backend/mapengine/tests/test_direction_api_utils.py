@@ -0,0 +1,104 @@
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ..constants import UPSTREAM_MAX_RETRIES
+from ..utils import direction_api_utils
+from ..utils.direction_api_utils import (
+    create_upstream_session,
+    ors_directions,
+    otp_directions,
+)
+
+GATEWAY_PAGE = b"<html><body><h1>502 Bad Gateway</h1></body></html>"
+
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    """Answers every request with the server's ``status``/``body`` after ``delay``."""
+
+    def answer(self):
+        self.server.requests += 1
+        time.sleep(self.server.delay)
+        self.send_response(self.server.status)
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    do_GET = do_POST = answer
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), UpstreamHandler)
+    server.requests, server.delay, server.status, server.body = 0, 0, 200, b"{}"
+    url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(direction_api_utils, "ORS_BASE_URL", url)
+    monkeypatch.setattr(direction_api_utils, "OTP_BASE_URL", url)
+    monkeypatch.setattr(
+        direction_api_utils, "upstream_session", create_upstream_session()
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_upstream_session_retries_idempotent_requests():
+    retry = create_upstream_session().get_adapter("https://ors").max_retries
+    assert retry.total == UPSTREAM_MAX_RETRIES
+    assert set(retry.status_forcelist) == {502, 503, 504}
+    assert "GET" in retry.allowed_methods
+    assert "POST" not in retry.allowed_methods
+    # the last response is returned rather than raised once the retries are used up
+    assert retry.raise_on_status is False
+
+
+def test_gateway_pages_are_reported_as_bad_gateway(upstream):
+    upstream.status, upstream.body = 502, GATEWAY_PAGE
+
+    route_info, code = ors_directions("1,2", "3,4", "foot-walking")
+    assert code == 502
+    assert route_info == {
+        "error": "Failed to get directions",
+        "ors_error": "ORS answered 502 with a body that isn't JSON",
+    }
+    assert upstream.requests == 1 + UPSTREAM_MAX_RETRIES
+
+    route_info, code = otp_directions("1,2", "3,4")
+    assert code == 502
+    assert route_info["otp_error"] == "OTP answered 502 with a body that isn't JSON"
+
+
+def test_ors_errors_are_passed_on(upstream):
+    upstream.status, upstream.body = 404, b'{"error": "Route not found"}'
+    route_info, code = ors_directions("1,2", "3,4", "foot-walking")
+    assert code == 400
+    assert route_info == {
+        "error": "Failed to get directions",
+        "ors_error": "Route not found",
+    }
+
+
+def test_upstream_timeouts_are_gateway_timeouts(upstream, monkeypatch):
+    monkeypatch.setattr(direction_api_utils, "UPSTREAM_TIMEOUT", (1, 0.05))
+    upstream.delay = 0.5
+    route_info, code = ors_directions("1,2", "3,4", "foot-walking")
+    assert code == 504
+    assert route_info["error"] == "Failed to get directions"
+
+
+def test_refused_connections_are_bad_gateways(monkeypatch):
+    with socket.socket() as closed:
+        closed.bind(("127.0.0.1", 0))
+        port = closed.getsockname()[1]
+    monkeypatch.setattr(direction_api_utils, "ORS_BASE_URL", f"http://127.0.0.1:{port}")
+
+    route_info, code = ors_directions("1,2", "3,4", "foot-walking")
+    assert code == 502
+    assert route_info["error"] == "Failed to get directions"
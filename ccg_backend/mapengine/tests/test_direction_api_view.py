@@ -1,3 +1,4 @@
+import time
 from unittest.mock import Mock, patch
 
 import pytest
@@ -12,6 +13,8 @@ from mapengine.exceptions.exceptions import (
 )
 from mapengine.models.building import Building
 from mapengine.models.shuttle import ShuttleStop
+from mapengine.utils.direction_api_utils import fetch_ors_legs
+from mapengine.utils.directions_cache import directions_cache
 from mapengine.views.direction_api_views import (
     build_combined_route,
     find_nearest_building,
@@ -29,6 +32,12 @@ CORRECT_PARAMS = f"?start={MOCK_H_BUILDING}&end={MOCK_VL_BUILDING}"
 INVALID_PARAMS = "?start=0,0&end=0,0"
 
 
+@pytest.fixture(autouse=True)
+def clear_directions_cache():
+    """Routes cached by one test must not answer the mocked upstream of another."""
+    directions_cache.clear()
+
+
 @pytest.fixture
 def api_client():
     """Fixture to provide API client."""
@@ -326,7 +335,7 @@ def test_multi_modal_shuttle_directions_mock_shuttle_stops_not_found(
 
 
 @pytest.mark.django_db
-@patch("mapengine.views.direction_api_views.ors_directions", return_value=({}, 500))
+@patch("mapengine.utils.direction_api_utils.ors_directions", return_value=({}, 500))
 def test_multi_modal_shuttle_directions_api_failure(
     mock_ors_directions, api_client, setup_test_data
 ):
@@ -359,3 +368,58 @@ def test_multi_modal_shuttle_directions_same_campus(
     assert response.status_code == 200
     json_data = response.json()
     assert json_data.get("profile") == "foot-walking"
+
+
+SHUTTLE_LEGS = {
+    "walk_to_stop": ("a", "b", "foot-walking"),
+    "shuttle_ride": ("b", "c", "driving-car"),
+    "walk_from_stop": ("c", "d", "foot-walking"),
+}
+
+
+def fake_ors_directions(delays, codes):
+    def ors_directions(start, end, profile):
+        time.sleep(delays.get(start, 0))
+        return {"start": start}, codes.get(start, 200)
+
+    return ors_directions
+
+
+def test_fetch_ors_legs_runs_legs_concurrently():
+    with patch(
+        "mapengine.utils.direction_api_utils.ors_directions",
+        fake_ors_directions({"a": 0.2, "b": 0.2, "c": 0.2}, {}),
+    ):
+        started = time.monotonic()
+        responses = fetch_ors_legs(SHUTTLE_LEGS, deadline=5)
+    assert time.monotonic() - started < 0.5
+    assert responses == {
+        "walk_to_stop": ({"start": "a"}, 200),
+        "shuttle_ride": ({"start": "b"}, 200),
+        "walk_from_stop": ({"start": "c"}, 200),
+    }
+
+
+def test_fetch_ors_legs_reports_the_earliest_failing_leg():
+    # leg 3 fails first, leg 1 fails later and is still waited for
+    with patch(
+        "mapengine.utils.direction_api_utils.ors_directions",
+        fake_ors_directions({"a": 0.1, "b": 2}, {"a": 400, "c": 500}),
+    ):
+        started = time.monotonic()
+        responses = fetch_ors_legs(SHUTTLE_LEGS, deadline=5)
+    # the slow shuttle leg isn't waited for once an earlier leg failed
+    assert time.monotonic() - started < 1
+    assert responses["walk_to_stop"] == ({"start": "a"}, 400)
+    assert "shuttle_ride" not in responses
+
+
+def test_fetch_ors_legs_stops_at_the_deadline():
+    with patch(
+        "mapengine.utils.direction_api_utils.ors_directions",
+        fake_ors_directions({"b": 2}, {}),
+    ):
+        started = time.monotonic()
+        responses = fetch_ors_legs(SHUTTLE_LEGS, deadline=0.2)
+    assert time.monotonic() - started < 1
+    assert set(responses) == {"walk_to_stop", "walk_from_stop"}
@@ -0,0 +1,239 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ..utils.directions_cache import (
+    DirectionsCache,
+    DjangoCacheBackend,
+    FileCacheBackend,
+    LocalCacheBackend,
+    create_directions_cache_backend,
+    parse_ttls,
+    quantize_point,
+)
+
+ROUTE = {"total_distance": 100.0, "total_duration": 60.0, "steps": []}
+TTLS = {"foot-walking": 60, "public-transport": 0.05}
+
+
+def fetcher(result=(ROUTE, 200)):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return result
+
+    return fetch, calls
+
+
+def test_parse_ttls():
+    assert parse_ttls("foot-walking=86400, public-transport=60,") == {
+        "foot-walking": 86400.0,
+        "public-transport": 60.0,
+    }
+
+
+def test_quantize_point_snaps_nearby_coordinates():
+    # ~1 m apart at the Hall building entrance
+    assert quantize_point("-73.578901,45.497301", 5) == quantize_point(
+        "-73.578912,45.497308", 5
+    )
+    # ~50 m apart
+    assert quantize_point("-73.5789,45.4973", 5) != quantize_point(
+        "-73.5789,45.4978", 5
+    )
+    assert quantize_point("-73.5789,45.4973", 0) == "-73.578900,45.497300"
+    assert quantize_point("invalid", 5) is None
+    assert quantize_point("nan,45", 5) is None
+
+
+def test_directions_cache_serves_nearby_requests_from_one_fetch():
+    cache = DirectionsCache(LocalCacheBackend(1024 * 1024), TTLS, grid_meters=5)
+    fetch, calls = fetcher()
+    for start in ("-73.578901,45.497301", "-73.578912,45.497308"):
+        assert cache.get_or_fetch("foot-walking", start, "-73.5783,45.4955", fetch) == (
+            ROUTE,
+            200,
+        )
+    assert len(calls) == 1
+    assert cache.stats() == {
+        "backend": "local",
+        "hits": 1,
+        "misses": 1,
+        "bypassed": 0,
+        "coalesced": 0,
+        "hit_rate": 0.5,
+        "saved_upstream_calls": 1,
+    }
+
+
+def test_directions_cache_skips_errors_and_uncached_profiles():
+    cache = DirectionsCache(LocalCacheBackend(1024 * 1024), TTLS, grid_meters=5)
+    fetch, calls = fetcher(({"error": "Failed to get directions"}, 400))
+    for _ in range(2):
+        cache.get_or_fetch("foot-walking", "1,2", "3,4", fetch)
+    assert len(calls) == 2
+
+    fetch, calls = fetcher()
+    for _ in range(2):
+        cache.get_or_fetch("driving-car", "1,2", "3,4", fetch)
+        cache.get_or_fetch("foot-walking", "invalid", "3,4", fetch)
+    assert len(calls) == 4
+    assert cache.stats()["bypassed"] == 4
+
+
+def test_directions_cache_entries_expire_with_their_profile_ttl():
+    cache = DirectionsCache(LocalCacheBackend(1024 * 1024), TTLS, grid_meters=5)
+    fetch, calls = fetcher()
+    cache.get_or_fetch("public-transport", "1,2", "3,4", fetch)
+    cache.get_or_fetch("public-transport", "1,2", "3,4", fetch)
+    assert len(calls) == 1
+    time.sleep(0.1)
+    cache.get_or_fetch("public-transport", "1,2", "3,4", fetch)
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("profile", ["foot-walking", "driving-car"])
+def test_directions_cache_coalesces_concurrent_identical_requests(profile):
+    cache = DirectionsCache(LocalCacheBackend(1024 * 1024), TTLS, grid_meters=5)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(timeout=5)
+        return ROUTE, 200
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                cache.get_or_fetch(profile, "1,2", "3,4", fetch)
+            )
+        )
+        for _ in range(5)
+    ]
+    threads[0].start()
+    assert started.wait(timeout=5)
+    for thread in threads[1:]:
+        thread.start()
+    while cache.flights.followers < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert results == [(ROUTE, 200)] * 5
+    assert cache.stats()["coalesced"] == 4
+    assert cache.stats()["saved_upstream_calls"] == 4
+
+
+def test_directions_cache_without_single_flight():
+    cache = DirectionsCache(
+        LocalCacheBackend(1024 * 1024), TTLS, grid_meters=5, single_flight=False
+    )
+    fetch, calls = fetcher()
+    cache.get_or_fetch("driving-car", "1,2", "3,4", fetch)
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 0
+
+
+def async_fetcher(result=(ROUTE, 200)):
+    calls = []
+
+    async def fetch():
+        calls.append(threading.get_ident())
+        return result
+
+    return fetch, calls
+
+
+@pytest.mark.parametrize("backend", ["local", "file"])
+def test_directions_cache_serves_async_requests(backend, tmp_path):
+    cache = DirectionsCache(
+        create_directions_cache_backend(backend, str(tmp_path)), TTLS, grid_meters=5
+    )
+    fetch, calls = async_fetcher()
+
+    async def requests():
+        return [
+            await cache.aget_or_fetch("foot-walking", "1,2", "3,4", fetch),
+            await cache.aget_or_fetch("foot-walking", "1,2", "3,4", fetch),
+            await cache.aget_or_fetch("driving-car", "1,2", "3,4", fetch),
+        ]
+
+    assert asyncio.run(requests()) == [(ROUTE, 200)] * 3
+    assert len(calls) == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["bypassed"]) == (1, 1, 1)
+    # the route is shared with the sync views
+    sync_fetch, sync_calls = fetcher()
+    assert cache.get_or_fetch("foot-walking", "1,2", "3,4", sync_fetch) == (ROUTE, 200)
+    assert sync_calls == []
+
+
+@pytest.mark.parametrize("profile", ["foot-walking", "driving-car"])
+def test_directions_cache_coalesces_concurrent_async_requests(profile):
+    cache = DirectionsCache(LocalCacheBackend(1024 * 1024), TTLS, grid_meters=5)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ROUTE, 200
+
+    async def requests():
+        return await asyncio.gather(
+            *(cache.aget_or_fetch(profile, "1,2", "3,4", fetch) for _ in range(5))
+        )
+
+    assert asyncio.run(requests()) == [(ROUTE, 200)] * 5
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 4
+    assert cache.async_flights.in_flight() == 0
+
+
+def test_blocking_backends_are_called_off_the_event_loop(tmp_path):
+    backend = FileCacheBackend(tmp_path)
+    threads = []
+    get = backend.get
+    backend.get = lambda key: threads.append(threading.get_ident()) or get(key)
+    cache = DirectionsCache(backend, TTLS, grid_meters=5)
+    fetch, calls = async_fetcher()
+
+    async def request():
+        await cache.aget_or_fetch("foot-walking", "1,2", "3,4", fetch)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(request())
+    assert len(threads) == 1 and threads[0] != loop_thread
+    assert calls == [loop_thread]
+
+
+def test_local_backend_is_bounded_by_size():
+    backend = LocalCacheBackend(max_bytes=3000)
+    for i in range(20):
+        backend.set(f"route{i}", {"steps": ["x" * 100]}, ttl=60)
+    assert backend.get("route0") is None
+    assert backend.get("route19") == {"steps": ["x" * 100]}
+
+
+def test_file_backend_shares_routes_across_instances(tmp_path):
+    FileCacheBackend(tmp_path).set("directions:foot-walking:a:b", ROUTE, ttl=60)
+    assert FileCacheBackend(tmp_path).get("directions:foot-walking:a:b") == ROUTE
+
+
+def test_create_directions_cache_backend(tmp_path):
+    assert isinstance(create_directions_cache_backend("local"), LocalCacheBackend)
+    assert isinstance(create_directions_cache_backend("django"), DjangoCacheBackend)
+    assert isinstance(
+        create_directions_cache_backend("file", str(tmp_path)), FileCacheBackend
+    )
+    assert create_directions_cache_backend("none") is None
+    with pytest.raises(ValueError):
+        create_directions_cache_backend("redis")
@@ -0,0 +1,141 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+from django.contrib.gis.geos import Point
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from mapengine.exceptions import IndoorMapRenderError
+from mapengine.models.building import Building
+
+MOCK_OUTDOOR_LEG = {
+    "profile": "foot-walking",
+    "total_distance": 250.0,
+    "total_duration": 180.0,
+    "steps": [],
+}
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def buildings():
+    Building.objects.create(
+        name="Hall Building", building_code="H", location=Point(-73.579, 45.4973)
+    )
+    Building.objects.create(
+        name="John Molson Building",
+        building_code="MB",
+        location=Point(-73.5792, 45.4953),
+    )
+
+
+@pytest.mark.django_db
+@patch("mapengine.views.door_to_door_directions.cached_directions")
+def test_door_to_door_directions(mock_ors, api_client, buildings):
+    mock_ors.return_value = (MOCK_OUTDOOR_LEG, 200)
+    url = reverse("door-to-door")
+    response = api_client.get(
+        url, {"start": "H867", "destination": "MB1.210", "disabled": "false"}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["origin_building"] == "H"
+    assert data["destination_building"] == "MB"
+    assert data["total_duration"] == 180.0
+    assert list(data["legs"]) == ["indoor_to_exit", "outdoor", "indoor_from_entrance"]
+    assert data["legs"]["indoor_to_exit"]["floor_sequence"] == ["H8", "H2", "H1"]
+    assert data["legs"]["indoor_from_entrance"]["floor_sequence"] == ["MB1"]
+    mock_ors.assert_called_once_with(
+        "-73.579,45.4973", "-73.5792,45.4953", "foot-walking"
+    )
+
+
+@pytest.mark.django_db
+@patch("mapengine.views.door_to_door_directions.cached_directions")
+def test_door_to_door_directions_same_building(mock_ors, api_client, buildings):
+    url = reverse("door-to-door")
+    response = api_client.get(url, {"start": "H867", "destination": "H913"})
+
+    assert response.status_code == 200
+    assert response.json()["legs"]["indoor"]["floor_sequence"] == ["H8", "H9"]
+    mock_ors.assert_not_called()
+
+
+@pytest.mark.django_db
+@patch("mapengine.views.door_to_door_directions.cached_directions")
+def test_door_to_door_directions_errors(mock_ors, api_client, buildings):
+    url = reverse("door-to-door")
+    assert api_client.get(url, {"start": "H867"}).status_code == 400
+    response = api_client.get(url, {"start": "H867", "destination": "doesntexist"})
+    assert response.status_code == 404
+
+    # no CC building in the database
+    response = api_client.get(url, {"start": "H867", "destination": "CC119"})
+    assert response.status_code == 404
+    assert response.json() == {"error": "Building CC not found."}
+
+    mock_ors.return_value = ({"error": "Failed to get directions"}, 400)
+    response = api_client.get(
+        url, {"start": "H867", "destination": "MB1.210", "disabled": "false"}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+@patch("mapengine.views.door_to_door_directions.cached_directions")
+def test_door_to_door_directions_cc_building(mock_ors, api_client, buildings):
+    Building.objects.create(
+        name="Central Building", building_code="CC", location=Point(-73.6404, 45.4583)
+    )
+    mock_ors.return_value = (MOCK_OUTDOOR_LEG, 200)
+    url = reverse("door-to-door")
+
+    response = api_client.get(
+        url, {"start": "CC119", "destination": "H867", "disabled": "false"}
+    )
+    assert response.status_code == 200
+    assert response.json()["legs"]["indoor_to_exit"]["floor_sequence"] == ["CC1"]
+
+    # the CC1 hallway only leads out of the rooms
+    response = api_client.get(
+        url, {"start": "H867", "destination": "CC119", "disabled": "false"}
+    )
+    assert response.status_code == 404
+    assert response.json() == {"error": "No reachable exit in building CC"}
+
+
+@pytest.mark.django_db
+@patch("mapengine.views.door_to_door_directions.get_building_exit_data")
+@patch("mapengine.views.door_to_door_directions.cached_directions")
+def test_door_to_door_directions_unrenderable_route(
+    mock_ors, mock_exit, api_client, buildings
+):
+    released, finished = threading.Event(), threading.Event()
+
+    def slow_ors(*args):
+        released.wait(5)
+        finished.set()
+        return MOCK_OUTDOOR_LEG, 200
+
+    mock_ors.side_effect = slow_ors
+    mock_exit.side_effect = IndoorMapRenderError(
+        "'H867' has no hallway segment to draw its route from"
+    )
+    url = reverse("door-to-door")
+    response = api_client.get(
+        url, {"start": "H867", "destination": "MB1.210", "disabled": "false"}
+    )
+
+    assert response.status_code == 422
+    assert response.json() == {
+        "error": "'H867' has no hallway segment to draw its route from"
+    }
+    # answered while the outdoor leg is still being fetched
+    assert not finished.is_set()
+    released.set()
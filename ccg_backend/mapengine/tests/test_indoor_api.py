@@ -1,19 +1,23 @@
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
+from ..exceptions import IndoorMapRenderError
 from ..utils.indoor_direction_api_utils import (
+    IndoorRoutingContext,
     convert_coords_to_output,
-    get_class_stair_sequence,
-    get_floor_sequence,
+    get_building_exit_data,
     get_hallway_class_point,
     get_indoor_directions_data,
+    get_nearest_facilities_data,
     get_node_sequence,
     get_path_coordinates,
     get_pins,
-    select_map,
+    nearest_to_building_node,
 )
+from ..utils.indoor_graph import FloorGraph
 
 MAP_DATA = {
     "H867": {
@@ -459,6 +463,15 @@ def test_get_path_coordinates():
     ]
 
 
+def test_get_path_coordinates_needs_a_hallway_segment():
+    map_data = {**MAP_DATA, "H813": {**MAP_DATA["H813"], "connections": ["C2"]}}
+    sequence = ["H867", "C1", "C2", "H813"]
+    # plain and compiled floors alike
+    for floor in (map_data, FloorGraph.from_json("H8", map_data)):
+        with pytest.raises(IndoorMapRenderError, match="'H813' has no hallway"):
+            get_path_coordinates(floor, sequence)
+
+
 def test_convert_coords_to_output():
     coords = [
         {"x": 160, "y": 200},
@@ -472,29 +485,12 @@ def test_convert_coords_to_output():
     assert output == "M160 200 L180 220 L180 220 L555 220 L765 220 L765 195"
 
 
-"""def test_select_map():
-    map_data = MAP_DATA
-    assert map_data == select_map("H8")
-    assert select_map("doesntexist") is None
-"""
-
-
-def test_get_floor_sequence():
-    sequence = get_floor_sequence("H867", "H967")
-    assert sequence == ["H8", "H9"]
-
-
-def test_get_class_stairs_sequence():
-    sequence = get_class_stair_sequence(MAP_DATA, "H867")
-    assert sequence == ["H867", "C7", "E1"]
-
-
 def test_get_indoor_direction_data():
     data = get_indoor_directions_data("H867", "H837", "false")
     assert data == {
         "floor_sequence": ["H8"],
         "path_data": {
-            "H8": "M160 200 L180 220 L180 400 L180 800 L555 800 L675 800 L675 820"
+            "H8": "M160 200 L180 220 L180 400 L555 400 L555 800 L675 800 L675 820"
         },
         "pin": {"H8": [[75, 105], [640, 900]]},
     }
@@ -508,7 +504,8 @@ def test_get_indoor_direction_data():
             "H8": "M275 380",
             "H2": "M470 500",
             "H1": "M605 886 L528 920",
-            "MB1": "M505 145 L465 165 L465 165 L465 420 L348 431 L350 450",
+            "MB1": "M505 145 L465 165 L465 420 L540 420 L540 805 L293 771 L279 509 "
+            "L460 500",
         },
         "pin": {
             "H9": [[740, 125], [265, 340]],
@@ -522,7 +519,8 @@ def test_get_indoor_direction_data():
     assert data == {
         "floor_sequence": ["MB1", "Outside", "H1", "H2", "H8", "H9"],
         "path_data": {
-            "MB1": "M460 500 L276 439",
+            "MB1": "M460 500 L279 509 L293 771 L540 805 L540 420 L465 420 L465 165 "
+            "L505 145",
             "H1": "M325 960 L300 920",
             "H2": "M470 500",
             "H8": "M275 380",
@@ -538,3 +536,115 @@ def test_get_indoor_direction_data():
     }
     data = get_indoor_directions_data("H913", "H867", "true")
     assert data["floor_sequence"] == ["H9", "H8"]
+
+
+def test_get_indoor_direction_data_alternatives():
+    context = IndoorRoutingContext("false", alternatives=2)
+    data = get_indoor_directions_data("H867", "H837", "false", context)
+    assert (
+        data["path_data"]
+        == get_indoor_directions_data("H867", "H837", "false")["path_data"]
+    )
+    alternatives = data["alternatives"]
+    assert len(alternatives) == 2
+    assert alternatives[0]["distance"] <= alternatives[1]["distance"]
+    for alternative in alternatives:
+        assert alternative["floor_sequence"] == ["H8"]
+        assert alternative["path_data"] != data["path_data"]
+        assert alternative["path_data"]["H8"].startswith("M160 200")
+        assert alternative["path_data"]["H8"].endswith("L675 820")
+    assert "alternatives" not in get_indoor_directions_data("H867", "H837", "false")
+
+
+def test_alternatives_walk_through_every_hallway_node_type():
+    # H1 hallways are made of "connection" nodes
+    context = IndoorRoutingContext("false", alternatives=2)
+    data = get_indoor_directions_data("H196", "WC1", "false", context)
+    assert len(data["alternatives"]) == 1
+    assert data["alternatives"][0]["floor_sequence"] == ["H1"]
+
+
+def test_get_nearest_facilities_data():
+    results = get_nearest_facilities_data("H867", "water-closet", 3, "false")
+    assert [(result["id"], result["floor"]) for result in results] == [
+        ("WC1", "H1"),
+        ("WC2", "H1"),
+    ]
+    assert results[0]["distance"] < results[1]["distance"]
+    assert results[0]["floor_sequence"] == ["H8", "H2", "H1"]
+    assert set(results[0]["path_data"]) == {"H8", "H2", "H1"}
+
+    # stairwells of other floors count, each one with its own route
+    results = get_nearest_facilities_data("H867", "stairs", 2, "false")
+    assert [(result["id"], result["floor"]) for result in results] == [
+        ("S1", "H8"),
+        ("S1", "H9"),
+    ]
+    # only the building of the room is searched
+    results = get_nearest_facilities_data("H867", "exit", 5, "false")
+    assert {result["floor"] for result in results} == {"H1"}
+    assert get_nearest_facilities_data("H867", "pool", 1, "false") is None
+
+
+@pytest.mark.parametrize(
+    "flag, disabled",
+    [(None, True), ("true", True), ("", True), ("false", False), ("False", False)],
+)
+def test_only_an_explicit_false_flag_routes_by_stairs(flag, disabled):
+    # as before the flag was parsed, a request without it is routed by elevator
+    assert IndoorRoutingContext(flag).disabled is disabled
+    assert IndoorRoutingContext(flag).connector_type == (
+        "elevator" if disabled else "stairs"
+    )
+
+
+def test_get_building_exit_data():
+    leaving = get_building_exit_data("H867", "false")
+    assert (leaving["id"], leaving["floor"]) == ("Exit", "H1")
+    assert leaving["floor_sequence"] == ["H8", "H2", "H1"]
+    assert (
+        leaving["distance"]
+        == get_nearest_facilities_data("H867", "exit", 1, "false")[0]["distance"]
+    )
+
+    # the way in starts at the exit
+    entering = get_building_exit_data("MB1.210", "false", leaving=False)
+    assert (entering["id"], entering["floor"]) == ("Exit", "MB1")
+    assert entering["path_data"]["MB1"].startswith("M505 145 ")
+    assert entering["pin"]["MB1"] == [[430, 100], [345, 645]]
+
+
+def test_ways_in_follow_one_way_connections():
+    context = IndoorRoutingContext()
+    building = context.snapshot.building_graphs[context.connector_type]
+    ways_in = 0
+    for floor, graph in building.graphs.items():
+        for room in graph:
+            if graph[room]["type"] != "room" or room not in context.snapshot.rooms:
+                continue
+            for _, _, path in nearest_to_building_node(building, room, "exit", context):
+                ways_in += 1
+                assert path[-1] == building.node_index(floor, room)
+                # not the way out reversed, some connections only go one way
+                for node, neighbor in zip(path, path[1:]):
+                    start, end = building.indptr[node], building.indptr[node + 1]
+                    assert neighbor in building.indices[start:end]
+    assert ways_in > 0
+
+
+def test_get_indoor_direction_data_is_reentrant():
+    requests = [
+        ("H913", "MB1.210", "false"),
+        ("MB1.210", "H913", "false"),
+        ("H913", "H867", "true"),
+        ("H867", "H837", "false"),
+    ] * 25
+    expected = {args: get_indoor_directions_data(*args) for args in set(requests)}
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(lambda args: get_indoor_directions_data(*args), requests)
+        )
+
+    for args, result in zip(requests, results):
+        assert result == expected[args]
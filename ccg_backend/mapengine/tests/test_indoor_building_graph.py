@@ -0,0 +1,181 @@
+import math
+
+import pytest
+
+from ..utils.indoor_building_graph import OUTSIDE, BuildingGraph
+from ..utils.indoor_graph import FloorGraph
+from ..utils.indoor_map_registry import indoor_map_registry
+from ..utils.indoor_pathfinding import search, settle
+
+
+def node(node_type, x, y, connections):
+    return {"type": node_type, "coords": {"x": x, "y": y}, "connections": connections}
+
+
+# S1 is right next to the room on the first floor but far from it on the second,
+# S2 is a bit further on the first floor and right next to the destination
+FLOORS = {
+    "X1": FloorGraph.from_json(
+        "X1",
+        {
+            "X101": node("room", 0, 0, ["C1"]),
+            "C1": node("corner", 0, 10, ["X101", "S1", "S2"]),
+            "S1": node("stairs", 10, 10, ["C1"]),
+            "S2": node("stairs", 100, 10, ["C1"]),
+        },
+    ),
+    "X2": FloorGraph.from_json(
+        "X2",
+        {
+            "X201": node("room", 1000, 0, ["C1"]),
+            "C1": node("corner", 1000, 10, ["X201", "S1", "S2"]),
+            "S1": node("stairs", 10, 10, ["C1"]),
+            "S2": node("stairs", 990, 10, ["C1"]),
+        },
+    ),
+}
+FLOOR_CONNECTIONS = FloorGraph.from_json(
+    "floor_connection_graph",
+    {"X1": {"connections": ["X2"]}, "X2": {"connections": ["X1"]}},
+)
+
+
+def route(building, start, destination):
+    path = search(
+        building,
+        building.node_index(*start),
+        lambda node: node == building.node_index(*destination),
+    )
+    return None if path is None else [building.locate(index) for index in path]
+
+
+def test_building_graph_picks_the_best_stairwell_for_the_whole_trip():
+    building = BuildingGraph(FLOORS, FLOOR_CONNECTIONS, "stairs", vertical_cost=50)
+    assert route(building, ("X1", "X101"), ("X2", "X201")) == [
+        ("X1", "X101"),
+        ("X1", "C1"),
+        ("X1", "S2"),
+        ("X2", "S2"),
+        ("X2", "C1"),
+        ("X2", "X201"),
+    ]
+
+
+def test_building_graph_routes_only_pass_places_to_change_floors():
+    # walking X1 straight from S1 to S2 is shorter, but a route can't walk past a
+    # stairwell without taking it
+    floors = {
+        **FLOORS,
+        "X1": FloorGraph.from_json(
+            "X1",
+            {
+                "X101": node("room", 0, 0, ["C1"]),
+                "C1": node("corner", 0, 10, ["X101", "S1"]),
+                "S1": node("stairs", 10, 10, ["C1", "S2"]),
+                "S2": node("stairs", 900, 10, ["S1", "X102"]),
+                "X102": node("room", 900, 0, ["S2"]),
+            },
+        ),
+    }
+    building = BuildingGraph(floors, FLOOR_CONNECTIONS, "stairs", vertical_cost=50)
+    assert route(building, ("X1", "X101"), ("X1", "X102")) == [
+        ("X1", "X101"),
+        ("X1", "C1"),
+        ("X1", "S1"),
+        ("X2", "S1"),
+        ("X2", "C1"),
+        ("X2", "S2"),
+        ("X1", "S2"),
+        ("X1", "X102"),
+    ]
+
+
+def test_real_routes_only_walk_through_hallways():
+    building = indoor_map_registry.snapshot().building_graphs["stairs"]
+    for start, destination in [
+        (("MB1", "MB1.115"), ("MB1", "MB1.309")),
+        (("H9", "H913"), ("MB1", "MB1.210")),
+        (("H8", "H837"), ("H1", "H110")),
+    ]:
+        path = route(building, start, destination)
+        for previous, (floor, node_id), following in zip(path, path[1:], path[2:]):
+            # other nodes are only passed to change floors
+            if floor != OUTSIDE and floor == previous[0] == following[0]:
+                assert building.graphs[floor][node_id]["type"] in (
+                    "corner",
+                    "connection",
+                )
+
+
+def test_building_graph_only_links_connectors_of_its_mode():
+    building = BuildingGraph(FLOORS, FLOOR_CONNECTIONS, "elevator")
+    assert route(building, ("X1", "X101"), ("X2", "X201")) is None
+    assert route(building, ("X1", "X101"), ("X1", "S2")) is not None
+
+
+def test_building_graph_locates_nodes():
+    building = BuildingGraph(FLOORS, FLOOR_CONNECTIONS, "stairs")
+    assert len(building) == 9
+    assert building.node_index("X2", "X201") == 4
+    assert building.locate(4) == ("X2", "X201")
+    assert building.locate(building.outside) == (OUTSIDE, None)
+    assert building.node_index("X2", "H867") is None
+    assert building.node_index("H8", "H867") is None
+
+
+def test_building_graph_links_exits_through_outside():
+    building = indoor_map_registry.snapshot().building_graphs["stairs"]
+    path = route(building, ("MB1", "MB1.210"), ("H1", "H110"))
+    outside = path.index((OUTSIDE, None))
+    start, end = outside - 1, outside + 2
+    assert path[start:end] == [
+        ("MB1", "Exit"),
+        (OUTSIDE, None),
+        ("H1", "Exit"),
+    ]
+
+
+def test_lower_bounds_count_the_walk_to_the_stairs_and_the_floor_changes_left():
+    building = BuildingGraph(FLOORS, FLOOR_CONNECTIONS, "stairs", vertical_cost=50)
+    bounds = building.lower_bounds_to(building.node_index("X2", "X201"))
+    # X1 nodes still walk to the closest stairwell and take it, Outside isn't linked
+    assert bounds == [70.0, 60.0, 50.0, 50.0] + [0.0] * 4 + [math.inf]
+    # cached per floor
+    target = building.node_index("X2", "C1")
+    assert building.lower_bounds_to(target) is building.lower_bounds_to(4)
+
+
+def test_lower_bounds_keep_routes_shortest_and_search_less():
+    building = indoor_map_registry.snapshot().building_graphs["stairs"]
+    source = building.node_index("H8", "H867")
+    target = building.node_index("H9", "H913")
+
+    def settled(heuristic):
+        nodes = []
+        for node, cost, path in settle(building, source, heuristic):
+            nodes.append(node)
+            if node == target:
+                return nodes, cost, path()
+
+    dijkstra, cost, path = settled(None)
+    astar, astar_cost, astar_path = settled(building.lower_bounds_to(target))
+    assert astar_cost == pytest.approx(cost)
+    assert astar_path == path
+    assert len(astar) < len(dijkstra)
+
+
+def test_connector_distances_only_walk_through_hallways():
+    floors = {
+        **FLOORS,
+        "X1": FloorGraph.from_json(
+            "X1",
+            {
+                "X101": node("room", 0, 0, ["X102"]),
+                "X102": node("room", 0, 10, ["X101", "S1"]),
+                "S1": node("stairs", 10, 10, ["X102"]),
+            },
+        ),
+    }
+    building = BuildingGraph(floors, FLOOR_CONNECTIONS, "stairs")
+    # X101 can't reach S1 through X102
+    assert building.connector_distances[:3].tolist() == [math.inf, 10.0, 0.0]
@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+from ..utils.indoor_direction_api_utils import get_hallway_class_point
+from ..utils.indoor_graph import FloorGraph
+from ..utils.indoor_map_registry import indoor_map_registry
+from ..utils.indoor_pathfinding import all_pairs_path, astar_indices
+
+NODES = {
+    "H801": {
+        "id": "H801",
+        "type": "room",
+        "pin": {"x": 225, "y": 180},
+        "coords": {"x": 225, "y": 195},
+        "connections": ["C1", "C2", "H899"],
+    },
+    "C1": {
+        "id": "C1",
+        "type": "corner",
+        "coords": {"x": 180, "y": 220},
+        "connections": ["C2", "H801"],
+    },
+    "C2": {
+        "id": "C2",
+        "type": "corner",
+        "coords": {"x": 555, "y": 220},
+        "connections": ["C1", "H801"],
+    },
+}
+
+
+def test_floor_graph_csr_arrays():
+    graph = FloorGraph.from_json("H8", NODES)
+    assert graph.ids == ("H801", "C1", "C2")
+    assert graph.index == {"H801": 0, "C1": 1, "C2": 2}
+    # the dangling H899 connection is dropped
+    assert graph.indptr.tolist() == [0, 2, 4, 6]
+    assert graph.indices.tolist() == [1, 2, 2, 0, 1, 0]
+    assert graph.weights[2] == 375
+    assert graph.coords.shape == (3, 2)
+    assert [graph.type_names[t] for t in graph.node_types] == [
+        "room",
+        "corner",
+        "corner",
+    ]
+    assert np.isnan(graph.pins[1]).all()
+    assert graph.nbytes > 0
+
+
+def test_floor_graph_node_views():
+    graph = FloorGraph.from_json("H8", NODES)
+    assert graph["H801"] == {
+        "id": "H801",
+        "type": "room",
+        "pin": {"x": 225, "y": 180},
+        "coords": {"x": 225, "y": 195},
+        "connections": ("C1", "C2"),
+    }
+    assert "pin" not in graph["C1"]
+    assert "H899" not in graph
+    assert list(graph) == ["H801", "C1", "C2"]
+    with pytest.raises(KeyError):
+        graph["H899"]
+
+
+def test_floor_graph_is_read_only():
+    graph = FloorGraph.from_json("H8", NODES)
+    with pytest.raises(TypeError):
+        graph["C1"]["type"] = "room"
+    # views are built once and shared, the nested coordinates are read-only too
+    assert graph["H801"] is graph["H801"]
+    with pytest.raises(TypeError):
+        graph["H801"]["coords"]["x"] = 0
+    with pytest.raises(ValueError):
+        graph.weights[0] = 0
+
+
+def test_floor_graph_without_coordinates_counts_hops():
+    graph = FloorGraph.from_json(
+        "floor_connection_graph",
+        {"H8": {"connections": ["H9"]}, "H9": {"connections": ["H8"]}},
+    )
+    assert graph.weights.tolist() == [1.0, 1.0]
+    assert graph.distances_to(0).tolist() == [0.0, 0.0]
+
+
+def path_length(graph, path):
+    return sum(
+        np.hypot(*(graph.coords[a] - graph.coords[b])) for a, b in zip(path, path[1:])
+    )
+
+
+@pytest.mark.parametrize("floor", ["H9", "MB1"])
+def test_all_pairs_tables_match_online_search(floor):
+    graph = indoor_map_registry.get_floor(floor)
+    assert graph.all_pairs is not None
+    online = FloorGraph.from_json(floor, graph, all_pairs_max_bytes=0)
+    assert online.all_pairs is None
+    for source in range(0, len(graph), 3):
+        for target in range(len(graph)):
+            path = all_pairs_path(graph, source, target)
+            expected = astar_indices(online, source, target)
+            if expected is None:
+                assert path is None
+                assert graph.all_pairs.distance[source, target] == np.inf
+                continue
+            assert path[0] == source and path[-1] == target
+            # rooms are never walked through, by the tables nor the search
+            assert graph.transit[path[1:-1]].all()
+            assert path_length(graph, path) == pytest.approx(
+                path_length(graph, expected)
+            )
+            assert graph.all_pairs.distance[source, target] == pytest.approx(
+                path_length(graph, path), rel=1e-6
+            )
+
+
+def test_all_pairs_tables_are_compact():
+    graph = FloorGraph.from_json("H8", NODES)
+    assert graph.all_pairs.next_hop.dtype == np.uint16
+    assert graph.all_pairs.distance.dtype == np.float32
+    assert graph.all_pairs.next_hop[1].tolist() == [0, 1, 2]
+    assert graph.memory_usage() == {
+        "nodes": 3,
+        "edges": 6,
+        "total_bytes": graph.nbytes,
+        "all_pairs_bytes": 54,
+        "uses_all_pairs": True,
+    }
+
+
+def test_hallway_points_match_projection_of_each_room():
+    graph = indoor_map_registry.get_floor("H8")
+    raw = {node_id: dict(graph[node_id]) for node_id in graph}
+    for node_id in graph:
+        if len(graph[node_id]["connections"]) < 2:
+            assert graph.hallway_point(node_id) is None
+            continue
+        expected = get_hallway_class_point(raw, node_id)
+        assert graph.hallway_point(node_id) == pytest.approx(expected)
+    assert not graph.projections.flags.writeable
@@ -0,0 +1,168 @@
+import json
+import shutil
+
+import numpy as np
+import pytest
+
+from ..exceptions import IndoorMapArtifactError
+from ..utils.indoor_map_artifact import (
+    ARTIFACT_FORMAT_VERSION,
+    ARTIFACT_NAME,
+    load_artifact,
+    source_digest,
+    write_artifact,
+)
+from ..utils.indoor_map_registry import INDOOR_MAPS_DIR, IndoorMapRegistry
+from ..utils.indoor_map_validation import (
+    ERROR,
+    WARNING,
+    unreachable_rooms,
+    validate_floor,
+    validate_floor_connection_graph,
+)
+
+
+@pytest.fixture
+def maps_dir(tmp_path):
+    for path in INDOOR_MAPS_DIR.glob("*.json"):
+        shutil.copy(path, tmp_path / path.name)
+    return tmp_path
+
+
+def compiled_graphs(maps_dir):
+    registry = IndoorMapRegistry(maps_dir, check_interval=-1)
+    registry.snapshot()
+    return {name: entry.graph for name, entry in registry._files.items()}
+
+
+def test_validate_floor_reports_broken_nodes():
+    nodes = {
+        "Stairs": {"type": "stairs", "coords": {"x": 0, "y": 0}, "connections": ["A"]},
+        "A": {"type": "corner", "coords": {"x": 1, "y": 0}, "connections": ["Stairs"]},
+        "R1": {"type": "room", "coords": {"x": 2, "y": 0}, "connections": ["A", "Z"]},
+        "R2": {"type": "room", "connections": None},
+    }
+    issues = {
+        (issue.severity, issue.node, issue.message)
+        for issue in validate_floor("X1", nodes)
+    }
+    assert (ERROR, "R2", "missing coords") in issues
+    assert (ERROR, "R2", "missing connections") in issues
+    assert (WARNING, "R1", "dangling connection Z") in issues
+    assert (WARNING, "R1", "asymmetric connection A") in issues
+    assert (WARNING, "R1", "room unreachable from the floor entries") in issues
+    # drawn paths join the hallway between a node's first two connections
+    assert (ERROR, "Stairs", "fewer than two hallway connections") in issues
+    assert (ERROR, "R1", "fewer than two hallway connections") in issues
+
+
+def test_unreachable_rooms_needs_a_way_in_and_out():
+    nodes = {
+        "Exit": {"type": "exit", "connections": ["R1", "R2"]},
+        "R1": {"type": "room", "connections": ["Exit"]},
+        "R2": {"type": "room", "connections": []},
+        "R3": {"type": "room", "connections": ["Exit"]},
+    }
+    assert unreachable_rooms(nodes) == ["R2", "R3"]
+
+
+def test_real_maps_have_no_errors(maps_dir):
+    floors = {
+        path.stem: json.loads(path.read_text())
+        for path in maps_dir.glob("*.json")
+        if path.stem != "floor_connection_graph"
+    }
+    issues = []
+    for floor, nodes in floors.items():
+        issues.extend(validate_floor(floor, nodes))
+    connections = json.loads((maps_dir / "floor_connection_graph.json").read_text())
+    issues.extend(validate_floor_connection_graph(connections, floors))
+    assert [issue for issue in issues if issue.severity == ERROR] == []
+
+
+def test_artifact_round_trip(maps_dir, tmp_path):
+    graphs = compiled_graphs(maps_dir)
+    meta = write_artifact(tmp_path / "out" / ARTIFACT_NAME, graphs)
+    loaded = load_artifact(tmp_path / "out" / ARTIFACT_NAME)
+
+    assert meta["sources"] == {name: graph.digest for name, graph in graphs.items()}
+    assert set(loaded) == set(graphs)
+    for name, graph in graphs.items():
+        assert loaded[name].digest == graph.digest
+        assert loaded[name].ids == graph.ids
+        original, restored = graph.to_arrays(), loaded[name].to_arrays()
+        assert set(original) == set(restored)
+        for key, array in original.items():
+            np.testing.assert_array_equal(restored[key], array)
+    assert loaded["H8"]["H867"] == graphs["H8"]["H867"]
+
+
+def test_artifact_rejects_tampering(maps_dir, tmp_path):
+    path = tmp_path / ARTIFACT_NAME
+    graphs = compiled_graphs(maps_dir)
+    write_artifact(path, graphs)
+    content = bytearray(path.read_bytes())
+    position = content.find(graphs["H8"].weights.tobytes())
+    assert position > 0
+    content[position] ^= 0xFF
+    path.write_bytes(content)
+
+    with pytest.raises(IndoorMapArtifactError, match="checksum"):
+        load_artifact(path)
+
+
+def test_artifact_rejects_other_format_versions(maps_dir, tmp_path):
+    path = tmp_path / ARTIFACT_NAME
+    write_artifact(path, compiled_graphs(maps_dir))
+    content = path.read_bytes()
+    version = f'"version": {ARTIFACT_FORMAT_VERSION}'.encode()
+    assert version in content
+    path.write_bytes(content.replace(version, b'"version": 0', 1))
+
+    with pytest.raises(IndoorMapArtifactError, match="format version"):
+        load_artifact(path)
+
+
+def test_artifact_arrays_are_mapped_read_only(maps_dir, tmp_path):
+    path = tmp_path / ARTIFACT_NAME
+    write_artifact(path, compiled_graphs(maps_dir))
+    graph = load_artifact(path)["H8"]
+
+    for array in graph.to_arrays().values():
+        if array.dtype.kind != "U":
+            assert not array.flags.owndata
+            assert not array.flags.writeable
+    with pytest.raises(ValueError):
+        graph.weights[0] = 0
+
+
+def test_load_artifact_rejects_empty_files(tmp_path):
+    (tmp_path / ARTIFACT_NAME).write_bytes(b"")
+    with pytest.raises(IndoorMapArtifactError):
+        load_artifact(tmp_path / ARTIFACT_NAME)
+
+
+def test_registry_uses_artifact_for_unchanged_floors(maps_dir, monkeypatch):
+    write_artifact(maps_dir / ARTIFACT_NAME, compiled_graphs(maps_dir))
+    h8 = json.loads((maps_dir / "H8.json").read_text())
+    h8["H867"]["pin"] = {"x": 1, "y": 2}
+    (maps_dir / "H8.json").write_text(json.dumps(h8))
+
+    compiled = []
+    monkeypatch.setattr(
+        IndoorMapRegistry,
+        "_compile",
+        staticmethod(lambda name, data, digest: compiled.append(name)),
+    )
+    registry = IndoorMapRegistry(maps_dir, check_interval=-1)
+    registry._scan()
+    assert compiled == ["H8"]
+    assert registry._files["H9"].graph.digest == source_digest(
+        (maps_dir / "H9.json").read_bytes()
+    )
+
+
+def test_registry_ignores_a_corrupt_artifact(maps_dir):
+    (maps_dir / ARTIFACT_NAME).write_bytes(b"not an artifact")
+    registry = IndoorMapRegistry(maps_dir, check_interval=-1)
+    assert "H8" in registry.snapshot().floors
@@ -0,0 +1,150 @@
+import json
+import os
+import shutil
+import threading
+
+import pytest
+
+from ..utils import indoor_map_registry
+from ..utils.indoor_graph import FloorGraph
+from ..utils.indoor_map_registry import (
+    INDOOR_MAPS_DIR,
+    IndoorMapRegistry,
+    setup_indoor_maps,
+)
+
+
+@pytest.fixture
+def maps_dir(tmp_path):
+    for path in INDOOR_MAPS_DIR.glob("*.json"):
+        shutil.copy(path, tmp_path / path.name)
+    return tmp_path
+
+
+def write_json(path, data):
+    # bump the mtime explicitly, some filesystems have a coarse timestamp resolution
+    stat = path.stat()
+    path.write_text(json.dumps(data))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_registry_loads_every_floor(maps_dir):
+    registry = IndoorMapRegistry(maps_dir, check_interval=0)
+    snapshot = registry.snapshot()
+    assert set(snapshot.floors) == {"CC1", "H1", "H2", "H8", "H9", "MB1", "MBS2"}
+    assert isinstance(registry.get_floor("H8"), FloorGraph)
+    assert "Outside" in registry.get_floor_connection_graph()
+    assert registry.get_floor("doesntexist") is None
+
+
+def test_registry_serves_read_only_views(maps_dir):
+    registry = IndoorMapRegistry(maps_dir, check_interval=0)
+    node = registry.get_floor("H8")["H867"]
+    with pytest.raises(TypeError):
+        node["type"] = "corner"
+    assert isinstance(node["connections"], tuple)
+
+
+def test_registry_does_not_recompile_unchanged_files(maps_dir):
+    registry = IndoorMapRegistry(maps_dir, check_interval=0)
+    snapshot = registry.snapshot()
+    # a touch without a content change only costs a hash, not a reload
+    path = maps_dir / "H8.json"
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert registry.snapshot() is snapshot
+
+
+def test_registry_reloads_changed_floor_only(maps_dir):
+    registry = IndoorMapRegistry(maps_dir, check_interval=0)
+    h8 = registry.get_floor("H8")
+    h9 = registry.get_floor("H9")
+
+    path = maps_dir / "H8.json"
+    data = json.loads(path.read_text())
+    data["H867"]["pin"] = {"x": 1, "y": 2}
+    write_json(path, data)
+
+    snapshot = registry.snapshot()
+    assert snapshot.version == 2
+    assert snapshot.get_floor("H8") is not h8
+    assert snapshot.get_floor("H8")["H867"]["pin"] == {"x": 1, "y": 2}
+    assert snapshot.get_floor("H9") is h9
+
+
+def test_registry_keeps_last_good_version_on_invalid_json(maps_dir):
+    registry = IndoorMapRegistry(maps_dir, check_interval=0)
+    h8 = registry.get_floor("H8")
+    path = maps_dir / "H8.json"
+    stat = path.stat()
+    path.write_text("{ not json")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert registry.get_floor("H8") is h8
+
+
+def test_registry_without_checks_never_touches_the_files(maps_dir):
+    registry = IndoorMapRegistry(maps_dir, check_interval=-1)
+    snapshot = registry.snapshot()
+    (maps_dir / "H8.json").unlink()
+    assert registry.snapshot() is snapshot
+    assert registry.refresh(force=True).get_floor("H8") is None
+
+
+def test_registry_reports_reload_timings(maps_dir):
+    registry = IndoorMapRegistry(maps_dir, check_interval=0)
+    registry.snapshot()
+    assert registry.last_reload.version == 1
+    assert "H8" in registry.last_reload.changed
+
+    path = maps_dir / "H8.json"
+    data = json.loads(path.read_text())
+    data["H867"]["pin"] = {"x": 1, "y": 2}
+    write_json(path, data)
+
+    registry.snapshot()
+    assert registry.last_reload.version == 2
+    assert registry.last_reload.changed == ("H8",)
+    assert 0 < registry.last_reload.compile_ms <= registry.last_reload.swap_ms
+
+
+def test_watcher_swaps_in_edits_without_request_checks(maps_dir):
+    registry = IndoorMapRegistry(maps_dir, check_interval=0)
+    snapshot = registry.snapshot()
+    swapped = threading.Event()
+    registry.add_listener(lambda snapshot: swapped.set())
+    registry.start_watcher(interval=0.01)
+    try:
+        # requests no longer stat the files while the watcher runs
+        assert not registry._is_stale()
+
+        path = maps_dir / "H8.json"
+        data = json.loads(path.read_text())
+        data["H867"]["pin"] = {"x": 1, "y": 2}
+        write_json(path, data)
+
+        assert swapped.wait(timeout=5)
+        assert registry.snapshot() is not snapshot
+        assert registry.get_floor("H8")["H867"]["pin"] == {"x": 1, "y": 2}
+        assert registry.get_floor("H9") is snapshot.get_floor("H9")
+    finally:
+        registry.stop_watcher()
+    assert registry._watcher is None
+
+
+@pytest.mark.parametrize(
+    "preload, watch, loaded",
+    [(False, False, False), (True, False, True), (False, True, True)],
+)
+def test_setup_indoor_maps_follows_the_settings(
+    maps_dir, monkeypatch, preload, watch, loaded
+):
+    registry = IndoorMapRegistry(maps_dir)
+    monkeypatch.setattr(indoor_map_registry, "indoor_map_registry", registry)
+    monkeypatch.setattr(indoor_map_registry, "INDOOR_MAPS_PRELOAD", preload)
+    monkeypatch.setattr(indoor_map_registry, "INDOOR_MAPS_WATCH", watch)
+    setup_indoor_maps()
+    try:
+        assert (registry._snapshot is not None) == loaded
+        assert (registry._watcher is not None) == watch
+    finally:
+        registry.stop_watcher()
@@ -0,0 +1,57 @@
+import pytest
+
+from ..utils.indoor_direction_api_utils import (
+    IndoorRoutingContext,
+    convert_coords_to_array,
+    convert_coords_to_output,
+    get_indoor_directions_data,
+)
+from ..utils.indoor_path_geometry import (
+    douglas_peucker,
+    remove_redundant_points,
+    simplify_path,
+)
+
+
+def points(*pairs):
+    return [{"x": x, "y": y} for x, y in pairs]
+
+
+def test_remove_redundant_points():
+    coords = points((0, 0), (0, 0), (0, 5), (0, 10), (10, 10), (20, 10), (20, 10))
+    assert remove_redundant_points(coords) == points((0, 0), (0, 10), (20, 10))
+
+
+def test_remove_redundant_points_keeps_turnarounds():
+    coords = points((0, 0), (0, 10), (0, 5))
+    assert remove_redundant_points(coords) == coords
+    assert remove_redundant_points(points((1, 1))) == points((1, 1))
+
+
+def test_douglas_peucker_drops_points_within_tolerance():
+    coords = points((0, 0), (5, 1), (10, 0), (10, 10))
+    assert douglas_peucker(coords, 2) == points((0, 0), (10, 0), (10, 10))
+    assert douglas_peucker(coords, 0.5) == coords
+    assert simplify_path(coords) == coords
+
+
+def test_path_output_formats():
+    coords = points((160, 200), (180, 220), (180, 800))
+    assert convert_coords_to_output(coords) == "M160 200 L180 220 L180 800"
+    assert convert_coords_to_output(coords[:1]) == "M160 200"
+    assert convert_coords_to_array(coords) == [160, 200, 180, 220, 180, 800]
+
+
+def test_get_indoor_direction_data_path_formats():
+    context = IndoorRoutingContext("false", path_format="array")
+    data = get_indoor_directions_data("H867", "H837", "false", context)
+    assert data["path_data"] == {
+        "H8": [160, 200, 180, 220, 180, 400, 555, 400, 555, 800, 675, 800, 675, 820]
+    }
+
+    context = IndoorRoutingContext("false", tolerance=50)
+    data = get_indoor_directions_data("H867", "H837", "false", context)
+    assert data["path_data"] == {"H8": "M160 200 L180 400 L555 400 L555 800 L675 820"}
+
+    with pytest.raises(ValueError):
+        IndoorRoutingContext("false", path_format="png")
@@ -0,0 +1,128 @@
+import pytest
+
+from ..utils.indoor_graph import FloorGraph
+from ..utils.indoor_pathfinding import (
+    as_floor_graph,
+    astar,
+    edge_weight,
+    k_nearest,
+    k_shortest_paths,
+)
+
+
+def node(node_id, node_type, x, y, connections):
+    return {
+        "id": node_id,
+        "type": node_type,
+        "coords": {"x": x, "y": y},
+        "connections": connections,
+    }
+
+
+# A -> X -> B has fewer hops, A -> Y -> Z -> B is the shorter walk
+MAP_DATA = {
+    "A": node("A", "room", 0, 0, ["X", "Y"]),
+    "X": node("X", "corner", 50, 400, ["A", "B"]),
+    "Y": node("Y", "corner", 30, 0, ["A", "Z", "E1"]),
+    "Z": node("Z", "corner", 70, 0, ["Y", "B", "S1"]),
+    "B": node("B", "room", 100, 0, ["X", "Z"]),
+    "S1": node("S1", "stairs", 70, 500, ["Z"]),
+    "S2": node("S2", "stairs", 50, 900, ["X"]),
+    "E1": node("E1", "elevator", 30, 30, []),
+}
+
+
+def test_edge_weight():
+    assert edge_weight(MAP_DATA, "A", "Y") == 30
+    assert edge_weight({"a": {}, "b": {}}, "a", "b") == 1
+
+
+def test_astar_minimizes_distance_not_hops():
+    assert astar(MAP_DATA, "A", "B") == ["A", "Y", "Z", "B"]
+    assert astar(MAP_DATA, "A", "A") == ["A"]
+
+
+def test_astar_never_walks_through_a_room():
+    # cutting through R is shorter, but drawn paths stop at the first room
+    map_data = {
+        "A": node("A", "room", 0, 0, ["R", "Y"]),
+        "R": node("R", "room", 50, 0, ["A", "B"]),
+        "Y": node("Y", "corner", 0, 100, ["A", "Z"]),
+        "Z": node("Z", "corner", 100, 100, ["Y", "B"]),
+        "B": node("B", "room", 100, 0, ["R", "Z"]),
+    }
+    assert astar(map_data, "A", "B") == ["A", "Y", "Z", "B"]
+    assert astar(map_data, "A", "R") == ["A", "R"]
+    del map_data["Y"]
+    assert astar(map_data, "A", "B") is None
+
+
+def test_astar_unknown_or_unreachable_nodes():
+    assert astar(MAP_DATA, "A", "H800") is None
+    assert astar(MAP_DATA, "H800", "A") is None
+    # E1 has no outgoing connection
+    assert astar(MAP_DATA, "E1", "A") is None
+
+
+def test_astar_without_coordinates_uses_hop_count():
+    floor_graph = {
+        "H9": {"connections": ["H8"]},
+        "H8": {"connections": ["H9", "H2"]},
+        "H2": {"connections": ["H8"]},
+    }
+    assert astar(floor_graph, "H9", "H2") == ["H9", "H8", "H2"]
+
+
+def test_plain_dictionaries_are_searched_without_all_pairs_tables():
+    # the tables would take a search per node for the single query they answer
+    assert as_floor_graph(MAP_DATA).all_pairs is None
+    assert astar(MAP_DATA, "A", "B") == astar(
+        FloorGraph.from_json("", MAP_DATA), "A", "B"
+    )
+
+
+def test_k_nearest_settles_goals_in_distance_order():
+    graph = as_floor_graph(MAP_DATA)
+    room = graph.type_code("room")
+
+    def is_room(node):
+        return graph.node_types[node] == room
+
+    found = k_nearest(graph, graph.index["Z"], is_room, 5)
+    assert [(graph.ids[node], cost) for node, cost, _ in found] == [
+        ("B", 30),
+        ("A", 70),
+    ]
+    assert [graph.ids[node] for node in found[1][2]] == ["Z", "Y", "A"]
+    assert len(k_nearest(graph, graph.index["Z"], is_room, 1)) == 1
+    # S2 can't be walked to, only S1 is found
+    stairs = {graph.index["S1"], graph.index["S2"]}
+    found = k_nearest(graph, graph.index["A"], lambda node: node in stairs, 2)
+    assert [graph.ids[node] for node, _, _ in found] == ["S1"]
+
+
+def test_k_shortest_paths_ranks_loopless_alternatives():
+    grid = {
+        "A": node("A", "room", 0, 0, ["X", "Y"]),
+        "X": node("X", "corner", 0, 10, ["A", "B", "Y"]),
+        "Y": node("Y", "corner", 10, 0, ["A", "B", "X"]),
+        "B": node("B", "room", 10, 10, ["X", "Y"]),
+    }
+    graph = as_floor_graph(grid)
+    paths = k_shortest_paths(graph, graph.index["A"], graph.index["B"], 5)
+    ranked = [([graph.ids[i] for i in path], cost) for cost, path in paths]
+    assert ranked[:2] == [(["A", "X", "B"], 20), (["A", "Y", "B"], 20)]
+    assert [path for path, _ in ranked[2:]] == [
+        ["A", "X", "Y", "B"],
+        ["A", "Y", "X", "B"],
+    ]
+    assert ranked[2][1] == pytest.approx(10 + 200**0.5 + 10)
+
+    blocked = k_shortest_paths(
+        graph, graph.index["A"], graph.index["B"], 5, blocked_nodes=[graph.index["X"]]
+    )
+    assert [[graph.ids[i] for i in path] for _, path in blocked] == [["A", "Y", "B"]]
+    assert (
+        k_shortest_paths(graph, graph.index["A"], graph.index["B"], 5, 0)[:1]
+        == paths[:1]
+    )
@@ -0,0 +1,122 @@
+import pytest
+
+from ..utils import indoor_direction_api_utils
+from ..utils.indoor_direction_api_utils import (
+    IndoorRoutingContext,
+    get_cached_indoor_directions_data,
+    get_indoor_directions_batch,
+    get_indoor_directions_data,
+)
+from ..utils.indoor_map_registry import IndoorMapRegistry
+from ..utils.lru_cache import SizedLRUCache
+
+
+def test_lru_cache_evicts_least_recently_used_by_size():
+    cache = SizedLRUCache(max_bytes=10, sizeof=len)
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    assert cache.get("a") == "xxxx"
+    cache.set("c", "xxxx")
+
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.stats() == {
+        "entries": 2,
+        "bytes": 8,
+        "max_bytes": 10,
+        "hits": 1,
+        "misses": 0,
+        "evictions": 1,
+    }
+
+
+def test_lru_cache_skips_values_over_budget():
+    cache = SizedLRUCache(max_bytes=3, sizeof=len)
+    cache.set("a", "xx")
+    cache.set("a", "xxxx")
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 0
+
+    disabled = SizedLRUCache(max_bytes=0)
+    assert disabled.get_or_compute("a", lambda: "x") == "x"
+    assert len(disabled) == 0
+
+
+def test_lru_cache_counts_misses_and_caches_none():
+    cache = SizedLRUCache(max_bytes=1024)
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute("k", lambda: calls.append(1)) is None
+    assert len(calls) == 1
+    assert cache.hits == 2 and cache.misses == 1
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = SizedLRUCache(max_bytes=1024 * 1024)
+    monkeypatch.setattr(indoor_direction_api_utils, "indoor_directions_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def segment_cache(monkeypatch):
+    cache = SizedLRUCache(max_bytes=1024 * 1024)
+    monkeypatch.setattr(indoor_direction_api_utils, "indoor_segment_cache", cache)
+    return cache
+
+
+def test_routes_share_cached_segments(segment_cache):
+    first = get_indoor_directions_data("H867", "H110", "false")
+    assert first["floor_sequence"] == ["H8", "H2", "H1"]
+    assert segment_cache.stats()["misses"] == 3
+
+    # same stairwells from H8 down to H1, only the H1 segment is new
+    second = get_indoor_directions_data("H867", "WC1", "false")
+    assert second["floor_sequence"] == ["H8", "H2", "H1"]
+    assert segment_cache.stats()["hits"] == 2
+    assert second["path_data"]["H2"] is first["path_data"]["H2"]
+    assert second == get_indoor_directions_data(
+        "H867", "WC1", "false", IndoorRoutingContext("false")
+    )
+
+
+def test_cached_directions_match_uncached(cache):
+    expected = get_indoor_directions_data("H867", "H837", "false")
+    assert get_cached_indoor_directions_data("H867", "H837", "false") == expected
+    assert get_cached_indoor_directions_data("H867", "H837", "false") == expected
+    assert cache.hits == 1 and cache.misses == 1
+
+    # "false" and False are the same accessibility mode, "true" is another one
+    get_cached_indoor_directions_data("H867", "H837", False)
+    get_cached_indoor_directions_data("H867", "H837", "true")
+    assert cache.hits == 2 and cache.misses == 2
+
+
+def test_registry_listeners_run_on_new_snapshots(tmp_path):
+    (tmp_path / "X1.json").write_text("{}")
+    registry = IndoorMapRegistry(tmp_path, check_interval=-1)
+    seen = []
+    registry.add_listener(lambda snapshot: seen.append(snapshot.version))
+    registry.add_listener(lambda snapshot: 1 / 0)
+
+    registry.snapshot()
+    registry.refresh(force=True)
+    (tmp_path / "X2.json").write_text("{}")
+    registry.refresh(force=True)
+    assert seen == [1, 2]
+
+
+def test_batch_deduplicates_routes(cache):
+    routes = [
+        ("H867", "H837", "false"),
+        ("H867", "H837", False),
+        ("H867", "H837", "true"),
+        ("H867", "doesntexist", None),
+    ]
+    results = get_indoor_directions_batch(routes)
+
+    assert results[0] is results[1]
+    assert results[0] == get_indoor_directions_data("H867", "H837", "false")
+    assert results[2] == get_indoor_directions_data("H867", "H837", "true")
+    assert results[3] == {"error": "Room 'doesntexist' not found"}
+    assert cache.misses == 3 and cache.hits == 0
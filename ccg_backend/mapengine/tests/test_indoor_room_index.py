@@ -0,0 +1,48 @@
+import pytest
+
+from ..exceptions import RoomNotFoundError
+from ..utils.indoor_direction_api_utils import get_indoor_directions_data
+from ..utils.indoor_graph import FloorGraph
+from ..utils.indoor_map_registry import indoor_map_registry
+from ..utils.indoor_room_index import RoomIndex, RoomLocation, building_of
+
+
+def test_building_of_floor():
+    assert building_of("H8") == "H"
+    assert building_of("MB1") == "MB"
+    assert building_of("MBS2") == "MB"
+    assert building_of("CC1") == "CC"
+
+
+def test_resolves_rooms_of_every_floor():
+    rooms = indoor_map_registry.snapshot().rooms
+    assert rooms.resolve("H867") == RoomLocation("H", "H8")
+    assert rooms.resolve("H110") == RoomLocation("H", "H1")
+    assert rooms.resolve("MB1.210") == RoomLocation("MB", "MB1")
+    # MBS2 rooms don't start with their floor ID
+    assert rooms.resolve("S2.105") == RoomLocation("MB", "MBS2")
+    assert rooms.resolve("MBS2") == RoomLocation("MB", "MBS2")
+    assert rooms.resolve("CC119") == RoomLocation("CC", "CC1")
+
+
+def test_reports_unknown_and_ambiguous_rooms():
+    rooms = indoor_map_registry.snapshot().rooms
+    with pytest.raises(RoomNotFoundError, match="'H8999' not found"):
+        rooms.resolve("H8999")
+    with pytest.raises(RoomNotFoundError, match="more than one floor"):
+        rooms.resolve("Exit")
+    assert rooms.get("H8999") is None
+    with pytest.raises(RoomNotFoundError):
+        get_indoor_directions_data("H867", "H8999", "false")
+
+
+def test_ids_shared_between_floors_are_ambiguous():
+    floors = {
+        "A1": FloorGraph.from_json("A1", {"A101": {"connections": []}, "C1": {}}),
+        "A2": FloorGraph.from_json("A2", {"A201": {"connections": []}, "C1": {}}),
+    }
+    rooms = RoomIndex(floors)
+    assert rooms.get("A101").floor == "A1"
+    assert rooms.get("A201").floor == "A2"
+    assert "C1" not in rooms
+    assert rooms.ambiguous == {"C1"}
@@ -0,0 +1,49 @@
+from ..utils.indoor_graph import FloorGraph
+from ..utils.indoor_map_registry import indoor_map_registry
+from ..utils.indoor_room_search import RoomSearchIndex, normalize
+
+
+def search_ids(index, query, limit=10):
+    return [match.id for match in index.search(query, limit)]
+
+
+def test_normalize_ignores_case_and_punctuation():
+    assert normalize("mb1.210") == "MB1210"
+    assert normalize(" H-867 ") == "H867"
+
+
+def test_prefix_matches_are_ranked_shortest_first():
+    index = indoor_map_registry.snapshot().room_search
+    assert search_ids(index, "h86", 3) == ["H861", "H862", "H863"]
+    assert search_ids(index, "H867")[0] == "H867"
+    assert search_ids(index, "mb1.21")[0] == "MB1.210"
+
+
+def test_rooms_are_found_with_their_building_code():
+    index = indoor_map_registry.snapshot().room_search
+    match = index.search("MBS2.105", 1)[0]
+    assert (match.id, match.building, match.floor) == ("S2.105", "MB", "MBS2")
+    assert match.pin is not None
+
+
+def test_falls_back_to_ngrams_for_non_prefixes():
+    index = indoor_map_registry.snapshot().room_search
+    assert search_ids(index, "867")[0] == "H867"
+    assert search_ids(index, "zzz") == []
+    assert search_ids(index, "") == []
+
+
+def test_indexes_rooms_and_facilities_only():
+    floor = FloorGraph.from_json(
+        "X1",
+        {
+            "X101": {"type": "room", "pin": {"x": 1, "y": 2}},
+            "WC1": {"type": "water-closet"},
+            "C1": {"type": "corner"},
+            "S1": {"type": "stairs"},
+        },
+    )
+    index = RoomSearchIndex({"X1": floor})
+    assert [entry.id for entry in index.entries] == ["WC1", "X101"]
+    assert index.search("x1", 1)[0].pin == [1, 2]
+    assert index.search("s1") == []
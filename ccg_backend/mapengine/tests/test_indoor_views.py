@@ -0,0 +1,123 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def api_client():
+    """Fixture to provide API client."""
+    return APIClient()
+
+
+def test_get_indoor_directions(api_client):
+    url = reverse("indoor")
+    response = api_client.get(
+        url, {"start": "H867", "destination": "H837", "disabled": "false"}
+    )
+    assert response.status_code == 200
+    assert response.json()["floor_sequence"] == ["H8"]
+
+
+def test_get_indoor_directions_path_options(api_client):
+    url = reverse("indoor")
+    params = {"start": "H867", "destination": "H837", "path_format": "array"}
+    response = api_client.get(url, params)
+    assert response.status_code == 200
+    assert response.json()["path_data"]["H8"][:4] == [160, 200, 180, 220]
+
+    response = api_client.get(url, {**params, "alternatives": 1})
+    assert len(response.json()["alternatives"]) == 1
+    response = api_client.get(url, {**params, "alternatives": 99})
+    assert response.status_code == 400
+    response = api_client.get(url, {**params, "path_format": "png"})
+    assert response.status_code == 400
+    response = api_client.get(url, {**params, "tolerance": "-1"})
+    assert response.status_code == 400
+
+
+def test_get_indoor_directions_unknown_room(api_client):
+    url = reverse("indoor")
+    response = api_client.get(url, {"start": "H867", "destination": "doesntexist"})
+    assert response.status_code == 404
+    assert response.json() == {"error": "Room 'doesntexist' not found"}
+
+    response = api_client.get(url, {"start": "H867"})
+    assert response.status_code == 400
+
+
+def test_get_nearest_facilities(api_client):
+    url = reverse("indoor-nearest")
+    response = api_client.get(
+        url, {"start": "H867", "type": "water-closet", "k": 2, "disabled": "false"}
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["id"] for result in results] == ["WC1", "WC2"]
+    assert results[0]["floor_sequence"] == ["H8", "H2", "H1"]
+
+    response = api_client.get(url, {"start": "H867", "type": "pool"})
+    assert response.status_code == 400
+    response = api_client.get(url, {"start": "H867", "type": "exit", "k": 0})
+    assert response.status_code == 400
+    response = api_client.get(url, {"start": "H8999", "type": "exit"})
+    assert response.status_code == 404
+
+
+def test_get_indoor_directions_batch(api_client):
+    url = reverse("indoor-batch")
+    routes = [
+        {"start": "H867", "destination": "H837", "disabled": False},
+        ["H867", "H837"],
+        ["H867", "doesntexist", True],
+    ]
+    response = api_client.post(url, {"routes": routes}, format="json")
+    assert response.status_code == 200
+    data = response.json()["routes"]
+    assert len(data) == 3
+    assert data[0] == data[1]
+    assert data[0]["floor_sequence"] == ["H8"]
+    assert data[2] == {"error": "Room 'doesntexist' not found"}
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {},
+        {"routes": "H867"},
+        {"routes": [["H867"]]},
+        {"routes": [{"start": "H867"}]},
+        {"routes": [["H867", "H837"]] * 1000},
+    ],
+)
+def test_get_indoor_directions_batch_rejects_invalid_bodies(api_client, body):
+    url = reverse("indoor-batch")
+    response = api_client.post(url, body, format="json")
+    assert response.status_code == 400
+    assert "error" in response.json()
+
+
+def test_search_rooms(api_client):
+    url = reverse("rooms-search")
+    response = api_client.get(url, {"q": "h86", "limit": 2})
+    assert response.status_code == 200
+    assert response.json() == {
+        "results": [
+            {
+                "id": "H861",
+                "type": "room",
+                "building": "H",
+                "floor": "H8",
+                "pin": response.json()["results"][0]["pin"],
+            },
+            {
+                "id": "H862",
+                "type": "room",
+                "building": "H",
+                "floor": "H8",
+                "pin": response.json()["results"][1]["pin"],
+            },
+        ]
+    }
+
+    response = api_client.get(url, {"q": "h86", "limit": "all"})
+    assert response.status_code == 400
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ..utils.single_flight import AsyncSingleFlight, SingleFlight
+
+
+def run_concurrently(flights, key, function, count):
+    """Starts ``count`` calls of ``key`` while the first one is still running."""
+    results = []
+
+    def call():
+        try:
+            results.append(flights.do(key, function))
+        except Exception as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def blocking(result=None, error=None):
+    release = threading.Event()
+    calls = []
+
+    def function():
+        calls.append(1)
+        release.wait(timeout=5)
+        if error is not None:
+            raise error
+        return result
+
+    return function, release, calls
+
+
+def wait_for_followers(flights, count):
+    deadline = time.monotonic() + 5
+    while flights.followers < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_followers_share_the_leader_result():
+    flights = SingleFlight()
+    function, release, calls = blocking(result={"route": 1})
+    threads, results = run_concurrently(flights, "key", function, 8)
+    wait_for_followers(flights, 7)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert results == [{"route": 1}] * 8
+    assert (flights.leaders, flights.followers) == (1, 7)
+    assert flights.in_flight() == 0
+
+
+def test_followers_get_the_leader_exception():
+    flights = SingleFlight()
+    error = ValueError("upstream down")
+    function, release, calls = blocking(error=error)
+    threads, results = run_concurrently(flights, "key", function, 3)
+    wait_for_followers(flights, 2)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert results == [error] * 3
+
+
+def test_keys_are_independent_and_released_when_done():
+    flights = SingleFlight()
+    assert flights.do("a", lambda: 1) == 1
+    assert flights.do("b", lambda: 2) == 2
+    # the key is free again once its call returned
+    assert flights.do("a", lambda: 3) == 3
+    with pytest.raises(KeyError):
+        flights.do("a", lambda: {}["missing"])
+    assert flights.do("a", lambda: 4) == 4
+    assert (flights.leaders, flights.followers) == (5, 0)
+    assert flights.in_flight() == 0
+
+
+def async_blocking(result=None, error=None):
+    release = asyncio.Event()
+    calls = []
+
+    async def function():
+        calls.append(1)
+        await release.wait()
+        if error is not None:
+            raise error
+        return result
+
+    return function, release, calls
+
+
+def test_async_followers_share_the_leader_result_or_exception():
+    flights = AsyncSingleFlight()
+    error = ValueError("upstream down")
+
+    async def run(key, **outcome):
+        function, release, calls = async_blocking(**outcome)
+        waiters = asyncio.gather(
+            *(flights.do(key, function) for _ in range(8)), return_exceptions=True
+        )
+        await asyncio.sleep(0.01)
+        assert flights.in_flight() == 1
+        release.set()
+        return await waiters, calls
+
+    results, calls = asyncio.run(run("a", result={"route": 1}))
+    assert len(calls) == 1
+    assert results == [{"route": 1}] * 8
+    results, calls = asyncio.run(run("a", error=error))
+    assert len(calls) == 1
+    assert results == [error] * 8
+    assert (flights.leaders, flights.followers) == (2, 14)
+    assert flights.in_flight() == 0
+
+
+def test_async_calls_outlive_cancelled_waiters():
+    flights = AsyncSingleFlight()
+    cancelled = []
+
+    async def run():
+        function, release, calls = async_blocking(result=1)
+
+        async def slow():
+            try:
+                return await function()
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+
+        leader = asyncio.ensure_future(flights.do("key", slow))
+        follower = asyncio.ensure_future(flights.do("key", slow))
+        await asyncio.sleep(0.01)
+        # the follower still waits, the call goes on
+        leader.cancel()
+        await asyncio.sleep(0.01)
+        assert cancelled == []
+        release.set()
+        assert await follower == 1
+
+        # nobody waits any more, the call is cancelled
+        release.clear()
+        waiter = asyncio.ensure_future(flights.do("key", slow))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.sleep(0.01)
+        assert cancelled == [1]
+        assert flights.in_flight() == 0
+
+    asyncio.run(run())
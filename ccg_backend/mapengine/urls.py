@@ -1,5 +1,6 @@
 from django.urls import path
 
+from mapengine.views.async_direction_views import async_directions
 from mapengine.views.building_views import get_buildings, get_buildings_by_campus
 from mapengine.views.department_views import (
     get_all_departments,
@@ -9,16 +10,23 @@ from mapengine.views.direction_api_views import (
     cycling_regular_directions,
     driving_car_directions,
     foot_walking_directions,
+    get_directions_cache_stats,
     get_profiles,
     public_transport_directions,
     shuttle_bus_directions,
     wheelchair_directions,
 )
-from mapengine.views.indoor_directions import get_indoor_directions
+from mapengine.views.door_to_door_directions import get_door_to_door_directions
+from mapengine.views.indoor_directions import (
+    get_indoor_directions,
+    get_indoor_directions_batch_view,
+    get_nearest_facilities,
+)
 from mapengine.views.point_of_interest_views import (
     get_all_categories,
     get_points_of_interest,
 )
+from mapengine.views.room_views import search_rooms
 from mapengine.views.route_views import route_list_create
 from mapengine.views.service_views import get_all_services, get_services_by_building
 from mapengine.views.shuttle_views import (
@@ -44,10 +52,36 @@ urlpatterns = [
     path(
         "directions/concordia-shuttle", shuttle_bus_directions, name="concordia-shuttle"
     ),
+    path(
+        "directions/async/<str:profile>",
+        async_directions,
+        name="async-directions",
+    ),
+    path(
+        "directions/cache-stats",
+        get_directions_cache_stats,
+        name="directions-cache-stats",
+    ),
     path("directions/", get_profiles, name="profiles"),
     path("shuttle_stops/", get_shuttle_stops, name="shuttle-stops"),
     path("upcoming_shuttle/", get_upcoming_sheduled_shuttle, name="upcoming-shuttle"),
     path("directions/indoor", get_indoor_directions, name="indoor"),
+    path(
+        "directions/indoor/batch",
+        get_indoor_directions_batch_view,
+        name="indoor-batch",
+    ),
+    path(
+        "directions/indoor/nearest",
+        get_nearest_facilities,
+        name="indoor-nearest",
+    ),
+    path(
+        "directions/door-to-door",
+        get_door_to_door_directions,
+        name="door-to-door",
+    ),
+    path("rooms/search", search_rooms, name="rooms-search"),
     path("departments/", get_all_departments, name="departments"),
     path(
         "departments-by-building/",
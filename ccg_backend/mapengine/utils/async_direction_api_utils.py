@@ -0,0 +1,166 @@
+import asyncio
+import weakref
+
+import httpx
+
+from ..constants import (
+    ORS_BASE_URL,
+    OTP_BASE_URL,
+    OTP_HEADER,
+    UPSTREAM_ASYNC_MAX_CONNECTIONS,
+    UPSTREAM_CONNECT_TIMEOUT,
+    UPSTREAM_MAX_RETRIES,
+    UPSTREAM_POOL_MAXSIZE,
+    UPSTREAM_READ_TIMEOUT,
+    otp_query,
+)
+from .direction_api_utils import (
+    invalid_response_error,
+    parse_ors_directions,
+    parse_otp_directions,
+    response_json,
+)
+from .directions_cache import directions_cache
+
+# httpx connections belong to the event loop that opened them, so there is one client
+# per loop: a single one under an ASGI server, one per request when Django runs the
+# async views of a WSGI deployment; each is kept with the generator closing it
+_clients = weakref.WeakKeyDictionary()
+
+
+async def get_async_client():
+    """
+    The httpx.AsyncClient of the running event loop, shared by every ORS/OTP call.
+
+    Uses the same timeouts as the sync client. Up to UPSTREAM_ASYNC_MAX_CONNECTIONS
+    requests are in flight at once, UPSTREAM_POOL_MAXSIZE idle connections are kept
+    alive and connection failures are retried UPSTREAM_MAX_RETRIES times. The client
+    is closed when its loop shuts down, e.g. at the end of each request under WSGI.
+    """
+    loop = asyncio.get_running_loop()
+    if loop in _clients:
+        return _clients[loop][0]
+    transport = httpx.AsyncHTTPTransport(
+        retries=UPSTREAM_MAX_RETRIES,
+        limits=httpx.Limits(
+            max_connections=UPSTREAM_ASYNC_MAX_CONNECTIONS,
+            max_keepalive_connections=UPSTREAM_POOL_MAXSIZE,
+        ),
+    )
+    client = httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(UPSTREAM_READ_TIMEOUT, connect=UPSTREAM_CONNECT_TIMEOUT),
+    )
+    lifetime = _client_lifetime(client)
+    _clients[loop] = (client, lifetime)
+    await lifetime.asend(None)
+    return client
+
+
+async def _client_lifetime(client):
+    # loop.shutdown_asyncgens(), run by asyncio.run() and by asgiref before closing a
+    # loop, closes the generators started on it, and with this one the client
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+# upstream errors: 504 when it didn't answer in time, 502 otherwise
+def async_upstream_error_status(error):
+    return 504 if isinstance(error, httpx.TimeoutException) else 502
+
+
+async def ors_directions_async(start, end, profile):
+    url = f"{ORS_BASE_URL}/{profile}?start={start}&end={end}"
+    try:
+        client = await get_async_client()
+        response = await client.get(url)
+    except httpx.HTTPError as e:
+        return {
+            "error": "Failed to get directions",
+            "ors_error": str(e),
+        }, async_upstream_error_status(e)
+    data = response_json(response)
+    if not isinstance(data, dict):
+        return invalid_response_error("ORS", response)
+    if response.status_code != 200:
+        ors_error = data.get("error", "Unknown error")
+        return {"error": "Failed to get directions", "ors_error": ors_error}, 400
+    return parse_ors_directions(data), 200
+
+
+async def otp_directions_async(start, end):
+    start = start.split(",")
+    end = end.split(",")
+    try:
+        client = await get_async_client()
+        response = await client.post(
+            OTP_BASE_URL, headers=OTP_HEADER, json=otp_query(start, end, True, 3)
+        )
+    except httpx.HTTPError as e:
+        return {
+            "error": "Failed to get directions",
+            "otp_error": str(e),
+        }, async_upstream_error_status(e)
+    data = response_json(response)
+    if not isinstance(data, dict):
+        return invalid_response_error("OTP", response)
+    # matching the steps to the path computes many geodesic distances, keep it off
+    # the event loop
+    return await asyncio.to_thread(parse_otp_directions, data, start, end)
+
+
+async def cached_directions_async(start, end, profile):
+    """
+    Async cached_directions: ors_directions_async (otp_directions_async for
+    "public-transport") served from directions_cache.
+    """
+    if profile == "public-transport":
+        return await directions_cache.aget_or_fetch(
+            profile, start, end, lambda: otp_directions_async(start, end)
+        )
+    return await directions_cache.aget_or_fetch(
+        profile, start, end, lambda: ors_directions_async(start, end, profile)
+    )
+
+
+async def fetch_ors_legs_async(legs, deadline):
+    """
+    Async version of fetch_ors_legs: fetches ``{name: (start, end, profile)}`` legs with
+    cached_directions_async concurrently and returns ``{name: (route_info, code)}``.
+
+    Once a leg fails, the legs after it are cancelled and the earliest failing leg is
+    always in the result. Legs still missing after ``deadline`` seconds are cancelled
+    and left out of the result.
+    """
+    order = {name: position for position, name in enumerate(legs)}
+    tasks = {
+        asyncio.ensure_future(cached_directions_async(*leg)): name
+        for name, leg in legs.items()
+    }
+    loop = asyncio.get_running_loop()
+    ends_at = loop.time() + deadline
+    results = {}
+    failed = len(legs)
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=max(0, ends_at - loop.time()),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            for task in done:
+                name = tasks[task]
+                results[name] = task.result()
+                if results[name][1] != 200:
+                    failed = min(failed, order[name])
+            pending = {task for task in pending if order[tasks[task]] < failed}
+    finally:
+        # legs that are no longer waited for stop here, their requests are aborted
+        for task in tasks:
+            task.cancel()
+    return results
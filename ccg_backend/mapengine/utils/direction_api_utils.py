@@ -1,24 +1,161 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 import numpy as np
 import polyline
 import requests
 from geopy.distance import geodesic
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from urllib3.exceptions import TimeoutError as UpstreamTimeoutError
+from urllib3.util.retry import Retry
 
 from ..constants import (
     ORS_BASE_URL,
     OTP_AVG_WALKING_SPEED,
     OTP_BASE_URL,
     OTP_HEADER,
+    UPSTREAM_CONNECT_TIMEOUT,
+    UPSTREAM_MAX_RETRIES,
+    UPSTREAM_POOL_CONNECTIONS,
+    UPSTREAM_POOL_MAXSIZE,
+    UPSTREAM_READ_TIMEOUT,
+    UPSTREAM_RETRY_BACKOFF,
     otp_query,
 )
+from .directions_cache import directions_cache
+
+UPSTREAM_TIMEOUT = (UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUT)
+
+
+def create_upstream_session():
+    """
+    Builds the requests.Session shared by every ORS/OTP call.
+
+    Connections are kept alive in per-host pools. Connection errors and 502/503/504
+    responses to idempotent requests (the ORS GETs) are retried with jittered
+    exponential backoff; OTP queries are POSTs and only retried when the connection
+    failed before the query was sent.
+    """
+    retry = Retry(
+        total=UPSTREAM_MAX_RETRIES,
+        backoff_factor=UPSTREAM_RETRY_BACKOFF,
+        backoff_jitter=UPSTREAM_RETRY_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=UPSTREAM_POOL_CONNECTIONS,
+        pool_maxsize=UPSTREAM_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+upstream_session = create_upstream_session()
+
+
+# upstream errors: 504 when it didn't answer in time, 502 otherwise
+def upstream_error_status(error):
+    # timeouts that used up the retries are raised as a ConnectionError, and urllib3
+    # reports a refused connection as a (subclass of) ConnectTimeoutError
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    timed_out = isinstance(reason, UpstreamTimeoutError) and not isinstance(
+        reason, NewConnectionError
+    )
+    if isinstance(error, requests.Timeout) or timed_out:
+        return 504
+    return 502
+
+
+# the decoded body, None when it isn't JSON (e.g. the HTML error page of a gateway
+# returned once the retries are used up)
+def response_json(response):
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def invalid_response_error(service, response):
+    return {
+        "error": "Failed to get directions",
+        f"{service.lower()}_error": f"{service} answered {response.status_code} "
+        "with a body that isn't JSON",
+    }, 502
 
 
 def ors_directions(start, end, profile):
     url = f"{ORS_BASE_URL}/{profile}?start={start}&end={end}"
-    response = requests.get(url)
+    try:
+        response = upstream_session.get(url, timeout=UPSTREAM_TIMEOUT)
+    except requests.RequestException as e:
+        return {
+            "error": "Failed to get directions",
+            "ors_error": str(e),
+        }, upstream_error_status(e)
+    data = response_json(response)
+    if not isinstance(data, dict):
+        return invalid_response_error("ORS", response)
     if response.status_code != 200:
-        ors_error = response.json().get("error", "Unknown error")
+        ors_error = data.get("error", "Unknown error")
         return {"error": "Failed to get directions", "ors_error": ors_error}, 400
-    return parse_ors_directions(response.json()), 200
+    return parse_ors_directions(data), 200
+
+
+def cached_directions(start, end, profile):
+    """
+    ors_directions (otp_directions for "public-transport") served from directions_cache.
+    """
+    if profile == "public-transport":
+        return directions_cache.get_or_fetch(
+            profile, start, end, lambda: otp_directions(start, end)
+        )
+    return directions_cache.get_or_fetch(
+        profile, start, end, lambda: ors_directions(start, end, profile)
+    )
+
+
+def fetch_ors_legs(legs, deadline):
+    """
+    Fetches ``{name: (start, end, profile)}`` legs with cached_directions concurrently.
+
+    Returns ``{name: (route_info, code)}``. Once a leg fails, the legs after it (in
+    ``legs`` order) are no longer waited for, so the earliest failing leg is always
+    in the result, as if the legs had been fetched one after the other. Legs still
+    missing after ``deadline`` seconds are left out of the result.
+    """
+    order = {name: position for position, name in enumerate(legs)}
+    executor = ThreadPoolExecutor(max_workers=len(legs))
+    futures = {
+        executor.submit(cached_directions, *leg): name for name, leg in legs.items()
+    }
+    ends_at = time.monotonic() + deadline
+    results = {}
+    failed = len(legs)
+    try:
+        pending = set(futures)
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=max(0, ends_at - time.monotonic()),
+                return_when=FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            for future in done:
+                name = futures[future]
+                results[name] = future.result()
+                if results[name][1] != 200:
+                    failed = min(failed, order[name])
+            pending = {future for future in pending if order[futures[future]] < failed}
+    finally:
+        # requests already sent finish in the background, their results are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
 
 
 def parse_ors_directions(geojson_data):
@@ -57,11 +194,23 @@ def otp_directions(start, end):
     start = start.split(",")
     end = end.split(",")
 
-    response = requests.post(
-        OTP_BASE_URL, headers=OTP_HEADER, json=otp_query(start, end, True, 3)
-    )
+    try:
+        response = upstream_session.post(
+            OTP_BASE_URL,
+            headers=OTP_HEADER,
+            json=otp_query(start, end, True, 3),
+            timeout=UPSTREAM_TIMEOUT,
+        )
+    except requests.RequestException as e:
+        return {
+            "error": "Failed to get directions",
+            "otp_error": str(e),
+        }, upstream_error_status(e)
 
-    return parse_otp_directions(response.json(), start, end)
+    data = response_json(response)
+    if not isinstance(data, dict):
+        return invalid_response_error("OTP", response)
+    return parse_otp_directions(data, start, end)
 
 
 def parse_otp_directions(json, start, end):
@@ -0,0 +1,300 @@
+import logging
+import math
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+
+from ..constants import (
+    DIRECTIONS_CACHE_BACKEND,
+    DIRECTIONS_CACHE_GRID_METERS,
+    DIRECTIONS_CACHE_LOCATION,
+    DIRECTIONS_CACHE_MAX_BYTES,
+    DIRECTIONS_CACHE_TTLS,
+    DIRECTIONS_SINGLE_FLIGHT,
+)
+from .lru_cache import SizedLRUCache, deep_sizeof
+from .single_flight import AsyncSingleFlight, SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# length of a degree of latitude (and of longitude at the equator)
+METERS_PER_DEGREE = 111_320
+# the file backend culls a third of its entries past that many routes
+FILE_CACHE_MAX_ENTRIES = 2000
+
+
+# "foot-walking=86400,public-transport=60" -> {"foot-walking": 86400.0, ...}
+def parse_ttls(spec):
+    ttls = {}
+    for item in spec.split(","):
+        if item.strip():
+            profile, _, seconds = item.partition("=")
+            ttls[profile.strip()] = float(seconds)
+    return ttls
+
+
+def quantize_point(point, grid_meters):
+    """
+    Snaps a "lon,lat" string to a grid of about ``grid_meters``, returns None when it
+    isn't a valid coordinate.
+    """
+    try:
+        lon, lat = map(float, point.split(","))
+    except (AttributeError, ValueError):
+        return None
+    if not (math.isfinite(lon) and math.isfinite(lat)):
+        return None
+    if grid_meters > 0:
+        lat_step = grid_meters / METERS_PER_DEGREE
+        lat = round(lat / lat_step) * lat_step
+        # meridians get closer away from the equator, keep the cells about square
+        lon_step = lat_step / max(math.cos(math.radians(lat)), 0.01)
+        lon = round(lon / lon_step) * lon_step
+    return f"{lon:.6f},{lat:.6f}"
+
+
+class LocalCacheBackend:
+    """In-process LRU bounded by the size of the routes, entries expire after a TTL."""
+
+    name = "local"
+
+    def __init__(self, max_bytes):
+        self._cache = SizedLRUCache(
+            max_bytes, sizeof=lambda entry: deep_sizeof(entry[1])
+        )
+
+    def get(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._cache.delete(key)
+            return None
+        return value
+
+    def set(self, key, value, ttl):
+        self._cache.set(key, (time.monotonic() + ttl, value))
+
+    # in memory and never blocking, async callers use it directly
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, value, ttl):
+        self.set(key, value, ttl)
+
+    def clear(self):
+        self._cache.clear()
+
+
+class DjangoCacheBackend:
+    """A cache of ``settings.CACHES``, e.g. one shared by every worker."""
+
+    name = "django"
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+
+    # Django cache connections are per thread, look it up on every use
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, ttl):
+        self.cache.set(key, value, timeout=ttl)
+
+    # a network or disk round trip, async callers run it on a worker thread
+    async def aget(self, key):
+        return await sync_to_async(self.get)(key)
+
+    async def aset(self, key, value, ttl):
+        await sync_to_async(self.set)(key, value, ttl)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class FileCacheBackend(DjangoCacheBackend):
+    """Routes stored in a directory, shared by the workers of a host across restarts."""
+
+    name = "file"
+
+    def __init__(self, directory, max_entries=FILE_CACHE_MAX_ENTRIES):
+        self._file_cache = FileBasedCache(
+            str(directory), {"OPTIONS": {"MAX_ENTRIES": max_entries}}
+        )
+
+    @property
+    def cache(self):
+        return self._file_cache
+
+
+def create_directions_cache_backend(
+    name=DIRECTIONS_CACHE_BACKEND,
+    location=DIRECTIONS_CACHE_LOCATION,
+    max_bytes=DIRECTIONS_CACHE_MAX_BYTES,
+):
+    if name == "local":
+        return LocalCacheBackend(max_bytes)
+    if name == "django":
+        return DjangoCacheBackend(location or "default")
+    if name == "file":
+        return FileCacheBackend(
+            location or Path(tempfile.gettempdir()) / "ccg_directions_cache"
+        )
+    if name == "none":
+        return None
+    raise ValueError(f"Unknown directions cache backend '{name}'")
+
+
+class DirectionsCache:
+    """
+    Outdoor directions keyed by (profile, start, end), the coordinates snapped to a
+    grid of ``grid_meters`` so requests a few meters apart share one route.
+
+    Only successful responses are stored, for the TTL of their profile; profiles
+    without a TTL, invalid coordinates and a None backend bypass the cache. Backend
+    failures are logged and treated as misses. Hits (upstream calls saved), misses
+    and bypassed requests are counted for ``stats()``. Cached routes are shared and
+    must not be modified.
+
+    With ``single_flight``, requests for a route already being fetched by this
+    process wait for that fetch and share its response, error responses included,
+    rather than calling the upstream again; this applies to profiles without a TTL
+    too, so the upstream sees at most one call per distinct route at a time. Async
+    requests are coalesced the same way, with the others of their event loop.
+    """
+
+    def __init__(self, backend, ttls, grid_meters, single_flight=True):
+        self.backend = backend
+        self.ttls = ttls
+        self.grid_meters = grid_meters
+        self.flights = SingleFlight() if single_flight else None
+        self.async_flights = AsyncSingleFlight() if single_flight else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def route_key(self, profile, start, end):
+        start = quantize_point(start, self.grid_meters)
+        end = quantize_point(end, self.grid_meters)
+        if start is None or end is None:
+            return None
+        return f"directions:{profile}:{start}:{end}"
+
+    def key(self, profile, start, end):
+        if self.backend is None or self.ttls.get(profile, 0) <= 0:
+            return None
+        return self.route_key(profile, start, end)
+
+    def get_or_fetch(self, profile, start, end, fetch):
+        """Returns ``fetch()``'s (route_info, code), from the cache when possible."""
+        key = self.route_key(profile, start, end)
+        cached = key is not None and self.key(profile, start, end) is not None
+        if not cached:
+            self._count("bypassed")
+            if key is None or self.flights is None:
+                return fetch()
+            return self.flights.do(key, fetch)
+
+        try:
+            route_info = self.backend.get(key)
+        except Exception:
+            logger.exception("Directions cache lookup failed")
+            route_info = None
+        if route_info is not None:
+            self._count("hits")
+            return route_info, 200
+
+        self._count("misses")
+        if self.flights is None:
+            return self._fetch_and_store(key, profile, fetch)
+        return self.flights.do(key, lambda: self._fetch_and_store(key, profile, fetch))
+
+    async def aget_or_fetch(self, profile, start, end, fetch):
+        """
+        get_or_fetch for async views, ``fetch`` being a coroutine function; backends
+        that block are called from a worker thread, off the event loop.
+        """
+        key = self.route_key(profile, start, end)
+        cached = key is not None and self.key(profile, start, end) is not None
+        if not cached:
+            self._count("bypassed")
+            if key is None or self.async_flights is None:
+                return await fetch()
+            return await self.async_flights.do(key, fetch)
+
+        try:
+            route_info = await self.backend.aget(key)
+        except Exception:
+            logger.exception("Directions cache lookup failed")
+            route_info = None
+        if route_info is not None:
+            self._count("hits")
+            return route_info, 200
+
+        self._count("misses")
+        if self.async_flights is None:
+            return await self._afetch_and_store(key, profile, fetch)
+        return await self.async_flights.do(
+            key, lambda: self._afetch_and_store(key, profile, fetch)
+        )
+
+    async def _afetch_and_store(self, key, profile, fetch):
+        route_info, code = await fetch()
+        if code == 200:
+            try:
+                await self.backend.aset(key, route_info, self.ttls[profile])
+            except Exception:
+                logger.exception("Directions cache update failed")
+        return route_info, code
+
+    def _fetch_and_store(self, key, profile, fetch):
+        route_info, code = fetch()
+        if code == 200:
+            try:
+                self.backend.set(key, route_info, self.ttls[profile])
+            except Exception:
+                logger.exception("Directions cache update failed")
+        return route_info, code
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        coalesced = (
+            self.flights.followers + self.async_flights.followers if self.flights else 0
+        )
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.backend.name if self.backend else "none",
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "coalesced": coalesced,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "saved_upstream_calls": self.hits + coalesced,
+            }
+
+
+directions_cache = DirectionsCache(
+    create_directions_cache_backend(),
+    parse_ttls(DIRECTIONS_CACHE_TTLS),
+    DIRECTIONS_CACHE_GRID_METERS,
+    DIRECTIONS_SINGLE_FLIGHT,
+)
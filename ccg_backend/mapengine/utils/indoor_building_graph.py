@@ -0,0 +1,227 @@
+import heapq
+
+import numpy as np
+
+from ..constants import INDOOR_OUTSIDE_TRANSITION_COST, INDOOR_VERTICAL_TRANSITION_COST
+from .indoor_graph import SearchLists, hallway_mask
+
+OUTSIDE = "Outside"
+EXIT = "Exit"
+
+
+def connector_distances(indptr, indices, weights, transit, crossings):
+    """
+    Walking distance from every node to the closest node it can change floors from.
+
+    A single multi-source Dijkstra runs backwards over the edges within a floor, from
+    every node with a crossing (stairwells or elevators linked to another floor, exits
+    linked to ``Outside``). Like routes, the walk only passes ``transit`` nodes. Nodes
+    with no way to leave their floor get an infinite distance.
+    """
+    n = len(indptr) - 1
+    within = ~crossings
+    sources = np.repeat(np.arange(n), np.diff(indptr))[within]
+    targets = indices[within]
+    # transposed adjacency of the floors, to follow edges backwards
+    order = np.argsort(targets, kind="stable")
+    reverse_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(targets, minlength=n), out=reverse_indptr[1:])
+    reverse_indptr = reverse_indptr.tolist()
+    reverse_indices = sources[order].tolist()
+    reverse_weights = weights[within][order].tolist()
+    transit = transit.tolist()
+
+    exits = set(np.repeat(np.arange(n), np.diff(indptr))[crossings].tolist())
+    distance = [np.inf] * n
+    heap = []
+    for node in exits:
+        distance[node] = 0.0
+        heap.append((0.0, node))
+    heapq.heapify(heap)
+    while heap:
+        cost, node = heapq.heappop(heap)
+        # a room or another stairwell can start a walk but not be walked through
+        if cost > distance[node] or (node not in exits and not transit[node]):
+            continue
+        for i in range(reverse_indptr[node], reverse_indptr[node + 1]):
+            previous = reverse_indices[i]
+            previous_cost = cost + reverse_weights[i]
+            if previous_cost < distance[previous]:
+                distance[previous] = previous_cost
+                heapq.heappush(heap, (previous_cost, previous))
+    return np.array(distance)
+
+
+class BuildingGraph:
+    """
+    Layered graph of every indoor floor for one accessibility mode.
+
+    Each floor's CSR adjacency is copied into a single index space (floor nodes are
+    offset by ``offsets[floor]``). Stairwells (or elevators, depending on
+    ``connector_type``) are linked to the connector with the same ID on every floor
+    adjacent in the floor connection graph, and the ``Exit`` of floors adjacent to
+    ``Outside`` are linked through one virtual ``Outside`` node, so a whole
+    multi-floor, multi-building route is found with a single search.
+
+    ``crossings`` flags the edges changing floors; with ``transit`` (hallway nodes
+    and ``Outside``) it lets searches take stairwells and exits without ever walking
+    through a room. ``floor_costs[a, b]`` is the cheapest sequence of floor changes
+    from floor position ``a`` to ``b`` (``Outside`` last, at ``floor_of`` -1), and
+    ``connector_distances`` the walk from every node to the closest stairwell (or
+    elevator, or linked exit) of its floor; together they bound what is left of a
+    route.
+    """
+
+    def __init__(
+        self,
+        floors,
+        floor_connection_graph,
+        connector_type,
+        vertical_cost=INDOOR_VERTICAL_TRANSITION_COST,
+        outside_cost=INDOOR_OUTSIDE_TRANSITION_COST,
+    ):
+        self.connector_type = connector_type
+        self.floors = tuple(sorted(floors))
+        self.graphs = {floor: floors[floor] for floor in self.floors}
+        self.offsets = {}
+        offset = 0
+        for floor in self.floors:
+            self.offsets[floor] = offset
+            offset += len(floors[floor])
+        self.outside = offset
+        self.floor_of = np.full(offset + 1, -1, dtype=np.int16)
+        # node types re-coded against the type names of all floors, -1 for Outside
+        self.type_names = tuple(
+            sorted({name for graph in floors.values() for name in graph.type_names})
+        )
+        self.node_types = np.full(offset + 1, -1, dtype=np.int8)
+
+        sources, targets, weights = [], [], []
+        for position, floor in enumerate(self.floors):
+            graph = floors[floor]
+            start, end = self.offsets[floor], self.offsets[floor] + len(graph)
+            self.floor_of[start:end] = position
+            codes = np.array(
+                [self.type_names.index(name) for name in graph.type_names] or [-1],
+                dtype=np.int8,
+            )
+            self.node_types[start:end] = codes[graph.node_types]
+            sources.append(np.repeat(np.arange(start, end), np.diff(graph.indptr)))
+            targets.append(graph.indices + start)
+            weights.append(graph.weights)
+
+        extra = []
+        for floor in self.floors:
+            if floor not in floor_connection_graph:
+                continue
+            for neighbor in floor_connection_graph[floor]["connections"]:
+                if neighbor == OUTSIDE:
+                    exit_index = self.node_index(floor, EXIT)
+                    if exit_index is not None:
+                        extra.append((exit_index, self.outside, outside_cost))
+                        extra.append((self.outside, exit_index, outside_cost))
+                elif neighbor in self.graphs:
+                    extra.extend(
+                        (source, target, vertical_cost)
+                        for source, target in self._vertical_links(floor, neighbor)
+                    )
+        if extra:
+            extra_sources, extra_targets, extra_weights = zip(*extra)
+            sources.append(np.array(extra_sources, dtype=np.int64))
+            targets.append(np.array(extra_targets, dtype=np.int64))
+            weights.append(np.array(extra_weights, dtype=np.float64))
+
+        sources = np.concatenate(sources + [np.empty(0, dtype=np.int64)])
+        targets = np.concatenate(targets + [np.empty(0, dtype=np.int64)])
+        weights = np.concatenate(weights + [np.empty(0)])
+        order = np.argsort(sources, kind="stable")
+        self.indptr = np.zeros(len(self) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=len(self)), out=self.indptr[1:])
+        self.indices = targets[order].astype(np.int32)
+        self.weights = weights[order]
+        self.crossings = self.floor_of[sources[order]] != self.floor_of[self.indices]
+        self.transit = hallway_mask(self.type_names, self.node_types)
+        self.transit[self.outside] = True
+        self.search_lists = SearchLists(
+            self.indptr.tolist(),
+            self.indices.tolist(),
+            self.weights.tolist(),
+            self.transit.tolist(),
+            self.crossings.tolist(),
+        )
+
+        positions = len(self.floors) + 1
+        self.floor_costs = np.full((positions, positions), np.inf)
+        np.fill_diagonal(self.floor_costs, 0.0)
+        changes = np.flatnonzero(self.crossings)
+        np.minimum.at(
+            self.floor_costs,
+            (
+                self.floor_of[sources[order][changes]],
+                self.floor_of[self.indices[changes]],
+            ),
+            self.weights[changes],
+        )
+        for via in range(positions):
+            np.minimum(
+                self.floor_costs,
+                self.floor_costs[:, via, None] + self.floor_costs[via],
+                out=self.floor_costs,
+            )
+        self.connector_distances = connector_distances(
+            self.indptr, self.indices, self.weights, self.transit, self.crossings
+        )
+        self._lower_bounds = {}
+
+    # connectors of the same type and ID on two adjacent floors
+    def _vertical_links(self, floor, neighbor):
+        graph, other = self.graphs[floor], self.graphs[neighbor]
+        other_code = other.type_code(self.connector_type)
+        for node in graph.nodes_of_type(self.connector_type):
+            target = other.index.get(graph.ids[node])
+            if target is not None and other.node_types[target] == other_code:
+                yield self.offsets[floor] + node, self.offsets[neighbor] + target
+
+    def lower_bounds_to(self, target):
+        """
+        Per node, a lower bound of the cost of the route to ``target``.
+
+        Away from the target's floor, a route still has to walk to a stairwell (or
+        elevator, or exit) and take the cheapest floor changes to that floor. Never
+        more than what is left and consistent along every edge, this is the A*
+        heuristic of building-wide searches. Built once per target floor.
+        """
+        floor = int(self.floor_of[target])
+        bounds = self._lower_bounds.get(floor)
+        if bounds is None:
+            bounds = np.where(
+                self.floor_of == self.floor_of[target],
+                0.0,
+                self.connector_distances + self.floor_costs[self.floor_of, floor],
+            ).tolist()
+            self._lower_bounds[floor] = bounds
+        return bounds
+
+    def __len__(self):
+        return self.outside + 1
+
+    def type_code(self, type_name):
+        try:
+            return self.type_names.index(type_name)
+        except ValueError:
+            return None
+
+    def node_index(self, floor, node_id):
+        if floor == OUTSIDE:
+            return self.outside
+        graph = self.graphs.get(floor)
+        if graph is None or node_id not in graph.index:
+            return None
+        return self.offsets[floor] + graph.index[node_id]
+
+    # returns the (floor, node ID) of a global index
+    def locate(self, index):
+        if index == self.outside:
+            return OUTSIDE, None
+        floor = self.floors[self.floor_of[index]]
+        return floor, self.graphs[floor].ids[index - self.offsets[floor]]
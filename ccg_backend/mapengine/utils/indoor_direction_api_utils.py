@@ -1,9 +1,68 @@
-# flake8: noqa: F824
-import json
-from collections import deque
-
 import numpy as np
 
+from ..constants import (
+    INDOOR_ALTERNATIVES_TIME_BUDGET,
+    INDOOR_DIRECTIONS_CACHE_MAX_BYTES,
+    INDOOR_SEGMENT_CACHE_MAX_BYTES,
+)
+from ..exceptions import IndoorMapRenderError, RoomNotFoundError
+from .indoor_building_graph import OUTSIDE
+from .indoor_graph import FloorGraph
+from .indoor_map_registry import indoor_map_registry
+from .indoor_path_geometry import simplify_path
+from .indoor_pathfinding import astar, k_nearest, k_shortest_paths, search, settle
+from .indoor_room_index import building_of
+from .lru_cache import SizedLRUCache
+
+# fully built responses, shared by every request and emptied whenever a map changes
+indoor_directions_cache = SizedLRUCache(INDOOR_DIRECTIONS_CACHE_MAX_BYTES)
+indoor_map_registry.add_listener(lambda snapshot: indoor_directions_cache.clear())
+# rendered (path data, pins) of single-floor segments, shared by every route using them
+indoor_segment_cache = SizedLRUCache(INDOOR_SEGMENT_CACHE_MAX_BYTES)
+indoor_map_registry.add_listener(lambda snapshot: indoor_segment_cache.clear())
+
+
+class IndoorRoutingContext:
+    """
+    Request-scoped state of the indoor planner.
+
+    Holds the accessibility mode, the map snapshot every floor is read from, how path
+    data is rendered (``path_format`` and the Douglas-Peucker ``tolerance``, 0 to only
+    drop redundant points) and how many alternative routes to add, so concurrent
+    requests never share mutable routing state.
+    """
+
+    def __init__(
+        self,
+        disabled=False,
+        snapshot=None,
+        path_format="svg",
+        tolerance=0,
+        alternatives=0,
+    ):
+        if path_format not in PATH_FORMATS:
+            raise ValueError(f"Unknown path format '{path_format}'")
+        self.disabled = is_disabled(disabled)
+        self.snapshot = snapshot or indoor_map_registry.snapshot()
+        self.path_format = path_format
+        self.tolerance = tolerance
+        self.alternatives = alternatives
+
+    @property
+    def connector_type(self):
+        return "elevator" if self.disabled else "stairs"
+
+
+# the flag comes straight from the query string: routes take elevators unless it is
+# "false", a missing flag included
+def is_disabled(disabled):
+    if disabled is None:
+        return True
+    if isinstance(disabled, str):
+        return disabled.lower() != "false"
+    return bool(disabled)
+
+
 """ main function of this file. returns a dictionary with all the data needed by the client
     example output:
     {
@@ -12,201 +71,380 @@ import numpy as np
         'pin': [[75, 105], [640, 900]] ==> array of pins to be displayed on the frontend to show point A and B
     }
 """
-last_used_stairs = ""
-isDisabled = False
 
 
-def get_indoor_directions_data(start, destination, disabled):
-    global isDisabled
-    isDisabled = disabled
+def get_indoor_directions_data(start, destination, disabled, context=None):
+    if context is None:
+        context = IndoorRoutingContext(disabled)
+
+    # raises RoomNotFoundError for rooms that aren't on any floor
+    start_floor = context.snapshot.rooms.resolve(start).floor
+    destination_floor = context.snapshot.rooms.resolve(destination).floor
 
-    floor_sequence = get_floor_sequence(start, destination)
-    if floor_sequence is None:
+    building = context.snapshot.building_graphs[context.connector_type]
+    segments = plan_route(building, start_floor, start, destination_floor, destination)
+    if segments is None:
         return None
+    data = build_directions_data(building, segments, context)
+    if data is not None and context.alternatives > 0:
+        data["alternatives"] = get_alternative_routes(
+            building,
+            building.node_index(start_floor, start),
+            building.node_index(destination_floor, destination),
+            data,
+            context,
+        )
+    return data
 
-    data = {"floor_sequence": floor_sequence, "path_data": {}, "pin": {}}
-    global last_used_stairs
-    last_used_stairs = ""
 
-    for i, floor in enumerate(floor_sequence):
-        print(floor)
-        if floor == "Outside":
-            last_used_stairs = ""
+def get_alternative_routes(building, source, target, data, context):
+    """
+    Up to ``context.alternatives`` other routes, shortest first, rendered like the
+    main one (plus their ``distance``) so clients can switch without another request.
+
+    Alternatives stay in hallways: between the ends of each floor they only walk
+    through the hallway nodes searches may pass (``transit``), never another room or
+    stairwell. Routes drawn exactly like the main route or a previous
+    alternative are skipped, and the search stops after
+    INDOOR_ALTERNATIVES_TIME_BUDGET seconds.
+    """
+    rooms = np.flatnonzero(building.node_types == building.type_code("room"))
+    paths = k_shortest_paths(
+        building,
+        source,
+        target,
+        # spare paths, some are drawn the same as others or leave the hallways
+        3 * context.alternatives + 1,
+        INDOOR_ALTERNATIVES_TIME_BUDGET,
+        blocked_nodes=rooms.tolist(),
+    )
+    alternatives = []
+    drawn = [data]
+    for cost, path in paths:
+        segments = split_route(building, path)
+        if not all(stays_in_hallways(building, segment) for segment in segments):
             continue
+        alternative = build_directions_data(building, segments, context)
+        if alternative is None or alternative in drawn:
+            continue
+        drawn.append(alternative)
+        alternatives.append({**alternative, "distance": round(cost, 1)})
+        if len(alternatives) == context.alternatives:
+            break
+    return alternatives
+
+
+# renders (floor, [node IDs]) segments as floor_sequence/path_data/pin
+def build_directions_data(building, segments, context):
+    floor_sequence = [floor for floor, _ in segments]
+    # the response is keyed by floor, a route coming back to a floor can't be described
+    if len(set(floor_sequence)) != len(floor_sequence):
+        return None
 
-        map_data = select_map(floor)
-        if map_data is None:
-            print("no map data")
-            return None
-
-        sequence, pin_array = determine_path_sequence(
-            i, floor_sequence, map_data, start, destination
+    data = {"floor_sequence": floor_sequence, "path_data": {}, "pin": {}}
+    for floor, sequence in segments:
+        if floor == OUTSIDE:
+            continue
+        data["path_data"][floor], data["pin"][floor] = render_segment(
+            building.graphs[floor], sequence, context
         )
-        if sequence is None:
-            print("no sequence")
-            return None
 
-        coords = get_path_coordinates(map_data, sequence)
-        data["path_data"][floor] = convert_coords_to_output(coords)
-        data["pin"][floor] = pin_array
-
-    print(data)
     return data
 
 
-def determine_path_sequence(i, floor_sequence, map_data, start, destination):
-    # global last_used_stairs
-    if len(floor_sequence) == 1:
-        return get_node_sequence(map_data, start, destination), get_pins(
-            map_data, start, destination
+def render_segment(map_data, sequence, context):
+    """
+    Path data and pins of a single-floor segment, served from ``indoor_segment_cache``.
+
+    Segments are cached per (map version, floor, node sequence, path rendering), so
+    the transit floors and stairwell legs shared by many routes are only drawn once,
+    whatever the accessibility mode. The returned values are shared and must not be
+    modified.
+    """
+    key = (
+        context.snapshot.version,
+        map_data.floor,
+        tuple(sequence),
+        context.path_format,
+        context.tolerance,
+    )
+
+    def render():
+        coords = simplify_path(
+            get_path_coordinates(map_data, sequence), context.tolerance
+        )
+        return (
+            PATH_FORMATS[context.path_format](coords),
+            get_pins(map_data, sequence[0], sequence[-1]),
         )
 
-    # If you're not going Outside after this floor and weren't just outside
-    if (
-        len(floor_sequence) > i + 1
-        and floor_sequence[i + 1] != "Outside"
-        and floor_sequence[i - 1] != "Outside"
-    ):
-        # If you didn't just use the stairs
-        if last_used_stairs == "":
-            sequence = get_class_stair_sequence(map_data, start)
-            pin_array = get_pins(map_data, start, last_used_stairs)
-        # If you are in between two floors
-        else:
-            sequence = get_node_sequence(map_data, last_used_stairs, last_used_stairs)
-            pin_array = get_pins(map_data, last_used_stairs, last_used_stairs)
-    # If you're going Outside after this floor
-    elif len(floor_sequence) > i + 1 and floor_sequence[i + 1] == "Outside":
-        # If this is the starting floor
-        if i == 0:
-            sequence = get_node_sequence(map_data, start, "Exit")
-            pin_array = get_pins(map_data, start, "Exit")
-        # If this isn't the stating floor
-        else:
-            sequence = get_node_sequence(map_data, last_used_stairs, "Exit")
-            pin_array = get_pins(map_data, last_used_stairs, "Exit")
-    # If there was a floor before current one
-    elif i > 0 and floor_sequence[i - 1] != "Outside":
-        sequence = get_node_sequence(map_data, last_used_stairs, destination)
-        pin_array = get_pins(map_data, last_used_stairs, destination)
-    # If you were Outside before this floor
-    elif i > 0 and floor_sequence[i - 1] == "Outside":
-        # If this isn't the destination floor
-        if i < len(floor_sequence) - 1:
-            sequence = get_class_stair_sequence(map_data, "Exit")
-            pin_array = get_pins(map_data, "Exit", last_used_stairs)
-        # If this is the destination floor
-        else:
-            sequence = get_node_sequence(map_data, "Exit", destination)
-            pin_array = get_pins(map_data, "Exit", destination)
-    else:
-        return None, None
+    return indoor_segment_cache.get_or_compute(key, render)
+
+
+def get_cached_indoor_directions_data(
+    start,
+    destination,
+    disabled,
+    snapshot=None,
+    path_format="svg",
+    tolerance=0,
+    alternatives=0,
+):
+    """
+    get_indoor_directions_data served from ``indoor_directions_cache``.
+
+    Routes are cached per (map version, start, destination, accessibility mode, path
+    rendering), missing routes included. The returned dictionary is shared and must
+    not be modified.
+    """
+    context = IndoorRoutingContext(
+        disabled, snapshot, path_format, tolerance, alternatives
+    )
+    # the version keeps a response computed on an older snapshot from being reused
+    key = (
+        context.snapshot.version,
+        start,
+        destination,
+        context.disabled,
+        path_format,
+        tolerance,
+        alternatives,
+    )
+    return indoor_directions_cache.get_or_compute(
+        key, lambda: get_indoor_directions_data(start, destination, disabled, context)
+    )
 
-    return sequence, pin_array
 
+def get_indoor_directions_batch(routes, path_format="svg", tolerance=0):
+    """
+    Returns the directions data of every (start, destination, disabled) route, in order.
 
-# returns an array of pins for the start and destination
-def get_pins(map_data, start, destination):
-    print(f"start: '{start}', destination: '{destination}'")
-    if "pin" not in map_data[start] or "pin" not in map_data[destination]:
+    The whole batch is answered from one map snapshot, and identical routes are only
+    computed (or looked up in the cache) once. Routes with an unknown room get an
+    ``{"error": ...}`` dictionary instead of failing the batch.
+    """
+    snapshot = indoor_map_registry.snapshot()
+    results = {}
+    for start, destination, disabled in routes:
+        key = (start, destination, is_disabled(disabled))
+        if key in results:
+            continue
+        try:
+            results[key] = get_cached_indoor_directions_data(
+                *key, snapshot, path_format, tolerance
+            )
+        except (RoomNotFoundError, IndoorMapRenderError) as e:
+            results[key] = {"error": e.message}
+    return [
+        results[(start, destination, is_disabled(disabled))]
+        for start, destination, disabled in routes
+    ]
+
+
+def get_nearest_facilities_data(start, node_type, k, disabled, context=None):
+    """
+    Returns the k nodes of ``node_type`` (e.g. "water-closet", "elevator", "exit")
+    closest to start, in the building of start, closest first.
+
+    Every result has the node's ``id``, ``floor`` and walking ``distance`` (map units,
+    floor changes included) along with the directions data to it, all found with a
+    single Dijkstra pass over the building graph. Returns None when no floor has nodes
+    of that type.
+    """
+    if context is None:
+        context = IndoorRoutingContext(disabled)
+    building = context.snapshot.building_graphs[context.connector_type]
+    nearest = nearest_in_building(building, start, node_type, k, context)
+    if nearest is None:
         return None
-    pin = [[map_data[start]["pin"]["x"], map_data[start]["pin"]["y"]]]
-
-    pin.append([map_data[destination]["pin"]["x"], map_data[destination]["pin"]["y"]])
-    return pin
 
+    results = []
+    for node, distance, path in nearest:
+        data = build_directions_data(building, split_route(building, path), context)
+        if data is None:
+            continue
+        floor, node_id = building.locate(node)
+        results.append(
+            {"id": node_id, "floor": floor, "distance": round(distance, 1), **data}
+        )
+    return results
+
+
+def get_building_exit_data(room, disabled, leaving=True, context=None):
+    """
+    Directions between a room and the closest exit of its building: from the room to
+    the exit when ``leaving``, from the exit to the room otherwise.
+
+    Returns the directions data with the exit's ``id``, ``floor`` and ``distance``,
+    or None when no exit of the building can be reached.
+    """
+    if context is None:
+        context = IndoorRoutingContext(disabled)
+    building = context.snapshot.building_graphs[context.connector_type]
+    # connections are one-way, the way in is searched from the exits to the room
+    nearest = (
+        nearest_in_building(building, room, "exit", 1, context)
+        if leaving
+        else nearest_to_building_node(building, room, "exit", context)
+    )
+    for node, distance, path in nearest or ():
+        data = build_directions_data(building, split_route(building, path), context)
+        if data is None:
+            return None
+        floor, node_id = building.locate(node)
+        return {"id": node_id, "floor": floor, "distance": round(distance, 1), **data}
+    return None
 
-# returns a sequence of nodes in a graph when given the start and destination nodes using BFS
-def get_node_sequence(map_data, start, destination):
 
-    if start not in map_data or destination not in map_data:
+# (node, distance, path) of the k nodes of a type closest to start within its building
+def nearest_in_building(building, start, node_type, k, context):
+    location = context.snapshot.rooms.resolve(start)
+    code = building.type_code(node_type)
+    if code is None:
         return None
+    source = building.node_index(location.floor, start)
+    if source is None:
+        raise RoomNotFoundError(f"Room '{start}' not found")
+    floors = building_floors(building, location.building)
+    node_types, floor_of = building.node_types, building.floor_of
 
-    queue = deque([(start, [start])])
-    visited = set()
+    def is_goal(node):
+        return node != source and node_types[node] == code and floor_of[node] in floors
 
-    while queue:
-        current_node, path = queue.popleft()
-        if current_node == destination:
-            return path
+    return k_nearest(building, source, is_goal, k)
 
-        if current_node not in visited:
-            visited.add(current_node)
-            for neighbor in map_data[current_node]["connections"]:
-                if neighbor not in visited:
-                    queue.append((neighbor, path + [neighbor]))
 
-    return None
+# [(node, distance, path)] of the node of a type with the shortest way to destination
+# within its building, the path leading from that node to destination
+def nearest_to_building_node(building, destination, node_type, context):
+    location = context.snapshot.rooms.resolve(destination)
+    code = building.type_code(node_type)
+    if code is None:
+        return None
+    target = building.node_index(location.floor, destination)
+    if target is None:
+        raise RoomNotFoundError(f"Room '{destination}' not found")
+    floors = building_floors(building, location.building)
+    sources = [
+        int(node)
+        for node in np.flatnonzero(building.node_types == code)
+        if node != target and building.floor_of[node] in floors
+    ]
+    for node, distance, path in settle(building, sources):
+        if node == target:
+            path = path()
+            return [(path[0], distance, path)]
+    return []
+
+
+# positions in building.floors of the floors of a building
+def building_floors(building, building_code):
+    return {
+        position
+        for position, floor in enumerate(building.floors)
+        if building_of(floor) == building_code
+    }
 
 
-# returns a sequence of nodes from a classroom to a stairwell
+def stays_in_hallways(building, segment):
+    floor, sequence = segment
+    if floor == OUTSIDE:
+        return True
+    graph = building.graphs[floor]
+    return all(graph.transit[graph.index[node_id]] for node_id in sequence[1:-1])
 
 
-def get_class_stair_sequence(map_data, classroom):
-    global isDisabled
-    global last_used_stairs
+# returns the route as (floor, [node IDs]) segments, or None when there is none
+def plan_route(building, start_floor, start, destination_floor, destination):
+    graph = building.graphs.get(start_floor)
+    # same-floor routes are table walks on floors small enough to have all-pairs tables
+    if (
+        start_floor == destination_floor
+        and graph is not None
+        and graph.all_pairs is not None
+    ):
+        sequence = get_node_sequence(graph, start, destination)
+        return None if sequence is None else [(start_floor, sequence)]
 
-    if classroom not in map_data:
+    source = building.node_index(start_floor, start)
+    target = building.node_index(destination_floor, destination)
+    if source is None or target is None:
         return None
 
-    queue = deque([(classroom, [classroom])])
-    visited = set()
+    # one search over every floor, stairwells and exits included, steered towards the
+    # destination floor so floors leading away from it are left unexplored
+    path = search(
+        building, source, lambda node: node == target, building.lower_bounds_to(target)
+    )
+    return None if path is None else split_route(building, path)
 
-    while queue:
-        current_node, path = queue.popleft()
-        if isDisabled == "false":
 
-            if map_data[current_node]["type"] == "stairs":
-                last_used_stairs = map_data[current_node]["id"]
-                return path
+# splits a building-wide route into consecutive (floor, [node IDs]) segments
+def split_route(building, path):
+    segments = []
+    for index in path:
+        floor, node_id = building.locate(index)
+        if segments and segments[-1][0] == floor:
+            segments[-1][1].append(node_id)
         else:
-            if map_data[current_node]["type"] == "elevator":
-                last_used_stairs = map_data[current_node]["id"]
-                return path
+            segments.append((floor, [node_id]))
+    return segments
 
-        if current_node not in visited:
-            visited.add(current_node)
-            for neighbor in map_data[current_node]["connections"]:
-                if neighbor not in visited:
-                    queue.append((neighbor, path + [neighbor]))
 
-    return None
+# returns an array of pins for the start and destination
+def get_pins(map_data, start, destination):
+    if "pin" not in map_data[start] or "pin" not in map_data[destination]:
+        return None
+    pin = [[map_data[start]["pin"]["x"], map_data[start]["pin"]["y"]]]
+
+    pin.append([map_data[destination]["pin"]["x"], map_data[destination]["pin"]["y"]])
+    return pin
+
+
+# returns the shortest sequence of nodes in a graph between the start and destination nodes
+def get_node_sequence(map_data, start, destination):
+    return astar(map_data, start, destination)
 
 
 # this function returns the closest point in the hallway to the class in order to connect the two graphically
 def get_hallway_class_point(map_data, room):
+    # compiled floors have it precomputed for every room
+    if isinstance(map_data, FloorGraph):
+        return map_data.hallway_point(room)
+
     corner1 = map_data[room]["connections"][0]
     corner2 = map_data[room]["connections"][1]
 
-    A = (map_data[corner1]["coords"]["x"], map_data[corner1]["coords"]["y"])
-    B = (map_data[corner2]["coords"]["x"], map_data[corner2]["coords"]["y"])
-    P = (map_data[room]["coords"]["x"], map_data[room]["coords"]["y"])
-
-    A, B, P = (
-        np.array(A, dtype=float),
-        np.array(B, dtype=float),
-        np.array(P, dtype=float),
-    )
-
-    AB = B - A
-    AP = P - A
+    ax, ay = map_data[corner1]["coords"]["x"], map_data[corner1]["coords"]["y"]
+    bx, by = map_data[corner2]["coords"]["x"], map_data[corner2]["coords"]["y"]
+    px, py = map_data[room]["coords"]["x"], map_data[room]["coords"]["y"]
 
-    ab_squared = np.dot(AB, AB)
+    abx, aby = bx - ax, by - ay
+    ab_squared = abx * abx + aby * aby
     if ab_squared == 0:
-        print("Degenerate line segment:", A)
-        return tuple(A)
+        return (ax, ay)
 
-    t = np.dot(AP, AB) / ab_squared
+    t = ((px - ax) * abx + (py - ay) * aby) / ab_squared
     t = max(0, min(1, t))
-    Q = A + t * AB
+    return (ax + t * abx, ay + t * aby)
+
 
-    return tuple(Q)
+# a node's hallway point, raises IndoorMapRenderError for nodes without one
+def hallway_point(map_data, node_id):
+    try:
+        point = get_hallway_class_point(map_data, node_id)
+    except (IndexError, KeyError):
+        point = None
+    if point is None:
+        raise IndoorMapRenderError(
+            f"'{node_id}' has no hallway segment to draw its route from"
+        )
+    return point
 
 
 # returns the list of coordinates for the path between two rooms
 def get_path_coordinates(map_data, path):
     coords = []
-    print(path)
     if len(path) == 1:
         coords.append(map_data[path[0]]["coords"])
         return coords
@@ -215,13 +453,13 @@ def get_path_coordinates(map_data, path):
         coords.append(map_data[path[1]]["coords"])
         return coords
     else:
-        p = get_hallway_class_point(map_data, path[0])
+        p = hallway_point(map_data, path[0])
         coords.append({"x": int(p[0]), "y": int(p[1])})
         i = 1
         while map_data[path[i]]["type"] == "corner":
             coords.append(map_data[path[i]]["coords"])
             i = i + 1
-        p = get_hallway_class_point(map_data, path[i])
+        p = hallway_point(map_data, path[i])
         coords.append({"x": int(p[0]), "y": int(p[1])})
         coords.append(map_data[path[i]]["coords"])
         return coords
@@ -229,35 +467,13 @@ def get_path_coordinates(map_data, path):
 
 # converts the array of coordinates to proper output format
 def convert_coords_to_output(coords):
-    output = "M" + str(coords[0]["x"]) + " " + str(coords[0]["y"])
-    if len(coords) == 1:
-        return output
-    i = 1
-    while i < len(coords):
-        output += " L" + str(coords[i]["x"]) + " " + str(coords[i]["y"])
-        i += 1
-    return output
-
-
-# returns the json graph associated with the floor
-def select_map(floor):
-    try:
-        with open("mapengine/fixtures/IndoorMaps/" + floor + ".json", "r") as file:
-            map_data = json.load(file)
-        return map_data
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        print(f"Error loading map data for floor {floor}: {e}")
-        return None
+    points = [f"{point['x']} {point['y']}" for point in coords]
+    return "M" + " L".join(points)
+
+
+# compact alternative to the SVG path: flat [x0, y0, x1, y1, ...] list
+def convert_coords_to_array(coords):
+    return [value for point in coords for value in (point["x"], point["y"])]
 
 
-# returns a sequence of floors to be traveled to get from point A to B
-def get_floor_sequence(start, destination):
-    with open("mapengine/fixtures/IndoorMaps/floor_connection_graph.json", "r") as file:
-        floor_graph = json.load(file)
-    for key in floor_graph:
-        if start.startswith(key):
-            start = key
-        if destination.startswith(key):
-            destination = key
-    sequence = get_node_sequence(floor_graph, start, destination)
-    return sequence
+PATH_FORMATS = {"svg": convert_coords_to_output, "array": convert_coords_to_array}
@@ -0,0 +1,363 @@
+import heapq
+from collections import namedtuple
+from collections.abc import Mapping
+from types import MappingProxyType
+
+import numpy as np
+
+from ..constants import INDOOR_ALL_PAIRS_MAX_BYTES
+
+# node types used to change floors: stairs by default, elevators for accessible routes
+CONNECTOR_TYPES = ("stairs", "elevator")
+# node types routes walk through, untyped nodes (the floor connection graph) included;
+# the others (rooms, stairwells, exits...) are places, drawn paths stop at the first one
+HALLWAY_TYPES = ("corner", "connection", "")
+
+# next_hop[u, v] is the node after u on the shortest path to v, distance[u, v] its length
+AllPairs = namedtuple("AllPairs", "next_hop distance")
+# the arrays searches read edge by edge, as Python lists built once per graph
+SearchLists = namedtuple("SearchLists", "indptr indices weights transit crossings")
+UNREACHABLE = np.iinfo(np.uint16).max
+
+
+def _point(value):
+    if value is None:
+        return (np.nan, np.nan)
+    return (value["x"], value["y"])
+
+
+# uint16 next hop plus float32 distance for every pair of nodes
+def all_pairs_nbytes(n):
+    return n * n * (np.dtype(np.uint16).itemsize + np.dtype(np.float32).itemsize)
+
+
+def all_pairs_tables(indptr, indices, weights, transit):
+    """
+    Next-hop and distance matrices of a floor, from one Dijkstra per source node.
+
+    Like the online search, routes only walk through ``transit`` nodes. Unreachable
+    pairs have an ``UNREACHABLE`` next hop and an infinite distance. This costs
+    O(n * e log n), compared with O(n^3) for Floyd-Warshall on these sparse graphs.
+    """
+    n = len(indptr) - 1
+    next_hop = np.full((n, n), UNREACHABLE, dtype=np.uint16)
+    distance = np.full((n, n), np.inf, dtype=np.float32)
+    indptr, indices, weights = indptr.tolist(), indices.tolist(), weights.tolist()
+    transit = transit.tolist()
+    for source in range(n):
+        first, costs = _shortest_path_tree(indptr, indices, weights, transit, source)
+        next_hop[source] = first
+        distance[source] = costs
+    return AllPairs(next_hop, distance)
+
+
+# Dijkstra from source, returns per node the first hop from source and the distance
+def _shortest_path_tree(indptr, indices, weights, transit, source):
+    n = len(indptr) - 1
+    costs = [np.inf] * n
+    first = [UNREACHABLE] * n
+    costs[source] = 0.0
+    first[source] = source
+    heap = [(0.0, source)]
+    while heap:
+        cost, node = heapq.heappop(heap)
+        if cost > costs[node] or (node != source and not transit[node]):
+            continue
+        for i in range(indptr[node], indptr[node + 1]):
+            neighbor = indices[i]
+            neighbor_cost = cost + weights[i]
+            if neighbor_cost < costs[neighbor]:
+                costs[neighbor] = neighbor_cost
+                first[neighbor] = neighbor if node == source else first[node]
+                heapq.heappush(heap, (neighbor_cost, neighbor))
+    return first, costs
+
+
+def hallway_projections(coords, indptr, indices):
+    """
+    Projects every node onto the hallway segment between its first two connections.
+
+    This is the point where a room's door joins the corridor on drawn paths; nodes
+    with fewer than two connections get NaN.
+    """
+    projections = np.full(coords.shape, np.nan)
+    has_segment = np.diff(indptr) >= 2
+    nodes = np.flatnonzero(has_segment)
+    a = coords[indices[indptr[nodes]]]
+    b = coords[indices[indptr[nodes] + 1]]
+    ab = b - a
+    ap = coords[nodes] - a
+    ab_squared = np.einsum("ij,ij->i", ab, ab)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.clip(np.einsum("ij,ij->i", ap, ab) / ab_squared, 0, 1)
+    # degenerate segments project onto their first corner
+    t[ab_squared == 0] = 0
+    projections[nodes] = a + t[:, None] * ab
+    return projections
+
+
+# coordinates are integers in the JSON files, keep them that way at the API boundary
+def _number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def hallway_mask(type_names, node_types):
+    codes = [code for code, name in enumerate(type_names) if name in HALLWAY_TYPES]
+    return np.isin(node_types, codes)
+
+
+class FloorGraph(Mapping):
+    """
+    Compiled, read-only graph of a single indoor floor.
+
+    Node IDs are interned to integer indices and the graph is stored as NumPy arrays: a
+    CSR adjacency (``indptr``/``indices``/``weights``), small-int node types indexing
+    ``type_names`` and ``(n, 2)`` float arrays for coordinates and pins (NaN when a node
+    has none). ``ids``/``index`` translate between node IDs and indices. ``transit``
+    flags the hallway nodes routes may walk through; a floor has no ``crossings``
+    (edges to another floor). ``search_lists`` holds the same adjacency as lists.
+
+    It still behaves like the ``{node_id: node}`` dictionary stored in
+    ``IndoorMaps/<floor>.json``: a read-only view of a node is built from the arrays
+    on first access and reused after, so it can be passed anywhere the routing
+    functions expect ``map_data``.
+    """
+
+    crossings = None
+
+    def __init__(
+        self,
+        floor,
+        ids,
+        type_names,
+        node_types,
+        coords,
+        pins,
+        indptr,
+        indices,
+        weights,
+        digest=None,
+        projections=None,
+        all_pairs=None,
+        all_pairs_max_bytes=INDOOR_ALL_PAIRS_MAX_BYTES,
+    ):
+        self.floor = floor
+        self.digest = digest
+        self.ids = tuple(ids)
+        self.index = {node_id: i for i, node_id in enumerate(self.ids)}
+        self.type_names = tuple(type_names)
+        self.node_types = node_types
+        self.coords = coords
+        self.pins = pins
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.transit = hallway_mask(self.type_names, node_types)
+        self.search_lists = SearchLists(
+            indptr.tolist(),
+            indices.tolist(),
+            weights.tolist(),
+            self.transit.tolist(),
+            None,
+        )
+        self._views = [None] * len(self.ids)
+        if projections is None:
+            projections = hallway_projections(coords, indptr, indices)
+        self.projections = projections
+
+        # small floors get O(1) route lookups, bigger ones fall back to online search
+        if all_pairs is None and all_pairs_nbytes(len(self.ids)) <= all_pairs_max_bytes:
+            all_pairs = all_pairs_tables(indptr, indices, weights, self.transit)
+        self.all_pairs = all_pairs
+
+        for array in self._arrays():
+            array.flags.writeable = False
+
+    @classmethod
+    def from_json(
+        cls, floor, nodes, digest=None, all_pairs_max_bytes=INDOOR_ALL_PAIRS_MAX_BYTES
+    ):
+        ids = list(nodes)
+        index = {node_id: i for i, node_id in enumerate(ids)}
+        type_names = sorted({node.get("type", "") for node in nodes.values()})
+        type_codes = {name: code for code, name in enumerate(type_names)}
+
+        node_types = np.array(
+            [type_codes[node.get("type", "")] for node in nodes.values()], dtype=np.int8
+        )
+        coords = np.array(
+            [_point(node.get("coords")) for node in nodes.values()], dtype=np.float64
+        ).reshape(-1, 2)
+        pins = np.array(
+            [_point(node.get("pin")) for node in nodes.values()], dtype=np.float64
+        ).reshape(-1, 2)
+
+        # dangling connections (to IDs missing from the floor) are dropped, order is kept
+        indptr = [0]
+        indices = []
+        for node in nodes.values():
+            indices.extend(
+                index[neighbor]
+                for neighbor in node.get("connections", [])
+                if neighbor in index
+            )
+            indptr.append(len(indices))
+        indptr = np.array(indptr, dtype=np.int32)
+        indices = np.array(indices, dtype=np.int32)
+
+        sources = np.repeat(np.arange(len(ids)), np.diff(indptr))
+        deltas = coords[indices] - coords[sources]
+        weights = np.hypot(deltas[:, 0], deltas[:, 1])
+        # graphs without coordinates (the floor connection graph) count hops instead
+        weights[np.isnan(weights)] = 1.0
+
+        return cls(
+            floor,
+            ids,
+            type_names,
+            node_types,
+            coords,
+            pins,
+            indptr,
+            indices,
+            weights,
+            digest,
+            all_pairs_max_bytes=all_pairs_max_bytes,
+        )
+
+    def to_arrays(self):
+        """Flattens the compiled floor into named arrays, see ``from_arrays``."""
+        arrays = {
+            "ids": np.array(self.ids, dtype=str),
+            "type_names": np.array(self.type_names, dtype=str),
+            "node_types": self.node_types,
+            "coords": self.coords,
+            "pins": self.pins,
+            "indptr": self.indptr,
+            "indices": self.indices,
+            "weights": self.weights,
+            "projections": self.projections,
+        }
+        if self.all_pairs is not None:
+            for field, array in self.all_pairs._asdict().items():
+                arrays[f"all_pairs_{field}"] = array
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, floor, arrays, digest=None):
+        """Rebuilds a floor from ``to_arrays`` output without recomputing any table."""
+        has_all_pairs = "all_pairs_next_hop" in arrays
+        all_pairs = None
+        if has_all_pairs:
+            all_pairs = AllPairs(
+                *(arrays[f"all_pairs_{field}"] for field in AllPairs._fields)
+            )
+        return cls(
+            floor,
+            arrays["ids"].tolist(),
+            arrays["type_names"].tolist(),
+            arrays["node_types"],
+            arrays["coords"],
+            arrays["pins"],
+            arrays["indptr"],
+            arrays["indices"],
+            arrays["weights"],
+            digest,
+            projections=arrays["projections"],
+            all_pairs=all_pairs,
+            # a floor compiled without tables was over budget, don't build them here
+            all_pairs_max_bytes=None if has_all_pairs else -1,
+        )
+
+    def _arrays(self):
+        yield from (
+            self.node_types,
+            self.coords,
+            self.pins,
+            self.indptr,
+            self.indices,
+            self.weights,
+            self.projections,
+            self.transit,
+        )
+        if self.all_pairs is not None:
+            yield from self.all_pairs
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self._arrays())
+
+    def memory_usage(self):
+        """Bytes used by the compiled floor, to size the all-pairs budget."""
+        return {
+            "nodes": len(self),
+            "edges": len(self.indices),
+            "total_bytes": self.nbytes,
+            "all_pairs_bytes": all_pairs_nbytes(len(self)),
+            "uses_all_pairs": self.all_pairs is not None,
+        }
+
+    def type_code(self, type_name):
+        try:
+            return self.type_names.index(type_name)
+        except ValueError:
+            return None
+
+    def nodes_of_type(self, type_name):
+        code = self.type_code(type_name)
+        if code is None:
+            return []
+        return np.flatnonzero(self.node_types == code).tolist()
+
+    # where a room's door meets the hallway, None for nodes with fewer than 2 connections
+    def hallway_point(self, node_id):
+        x, y = self.projections[self.index[node_id]].tolist()
+        if x != x:
+            return None
+        return x, y
+
+    def neighbors(self, i):
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end]
+
+    # straight-line distance from every node to the target, 0 where it's unknown
+    def distances_to(self, target):
+        deltas = self.coords - self.coords[target]
+        return np.nan_to_num(np.hypot(deltas[:, 0], deltas[:, 1]))
+
+    def __getitem__(self, node_id):
+        i = self.index[node_id]
+        view = self._views[i]
+        if view is None:
+            # races only build the same view twice
+            view = self._views[i] = self._node_view(i, node_id)
+        return view
+
+    def _node_view(self, i, node_id):
+        node = {
+            "id": node_id,
+            "type": self.type_names[self.node_types[i]],
+            "connections": tuple(self.ids[j] for j in self.neighbors(i).tolist()),
+        }
+        if not np.isnan(self.coords[i, 0]):
+            node["coords"] = MappingProxyType(
+                {"x": _number(self.coords[i, 0]), "y": _number(self.coords[i, 1])}
+            )
+        if not np.isnan(self.pins[i, 0]):
+            node["pin"] = MappingProxyType(
+                {"x": _number(self.pins[i, 0]), "y": _number(self.pins[i, 1])}
+            )
+        return MappingProxyType(node)
+
+    def __contains__(self, node_id):
+        return node_id in self.index
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __repr__(self):
+        return f"<FloorGraph {self.floor} ({len(self)} nodes)>"
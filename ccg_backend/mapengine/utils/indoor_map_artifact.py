@@ -0,0 +1,161 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from math import prod
+from pathlib import Path
+
+import numpy as np
+
+from ..exceptions import IndoorMapArtifactError
+from .indoor_graph import FloorGraph
+
+# bumped whenever the file layout or the arrays stored per floor change
+ARTIFACT_FORMAT_VERSION = 4
+ARTIFACT_NAME = "compiled_indoor_maps.bin"
+MAGIC = b"CCGMAPS\n"
+# magic followed by the byte length of the JSON header
+PREAMBLE = struct.Struct("<8sQ")
+# every array starts on a cache line, so mapped arrays are aligned for any dtype
+ALIGNMENT = 64
+
+
+# hash of an IndoorMaps JSON file, used to tell whether its compiled graph is current
+def source_digest(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def artifact_checksum(arrays):
+    """sha256 over every stored array, in key order, dtype and shape included."""
+    checksum = hashlib.sha256()
+    for key in sorted(arrays):
+        array = np.ascontiguousarray(arrays[key])
+        checksum.update(key.encode())
+        checksum.update(f"{array.dtype.str}{array.shape}".encode())
+        checksum.update(array)
+    return checksum.hexdigest()
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_artifact(path, graphs):
+    """
+    Writes compiled floor graphs (name -> FloorGraph) to a single memory-mappable file.
+
+    The file is a JSON header followed by the raw bytes of every array, each stored
+    as ``<floor>/<array>`` at an aligned offset. The header holds the format version,
+    the sha256 of each source JSON file, a checksum of all arrays and the dtype,
+    shape and offset of each array. The file is written next to its destination and
+    moved into place, so workers never see a partial artifact and those still mapping
+    the previous one keep a consistent view of it.
+    """
+    path = Path(path)
+    arrays = {}
+    sources = {}
+    for name, graph in graphs.items():
+        sources[name] = graph.digest
+        for key, array in graph.to_arrays().items():
+            arrays[f"{name}/{key}"] = np.ascontiguousarray(array)
+
+    layout = {}
+    offset = 0
+    for key, array in arrays.items():
+        layout[key] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset = _aligned(offset + array.nbytes)
+    meta = {
+        "version": ARTIFACT_FORMAT_VERSION,
+        "sources": sources,
+        "checksum": artifact_checksum(arrays),
+        "arrays": layout,
+    }
+    header = json.dumps(meta, sort_keys=True).encode()
+    data_start = _aligned(PREAMBLE.size + len(header))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(PREAMBLE.pack(MAGIC, len(header)))
+            f.write(header)
+            for key, array in arrays.items():
+                f.seek(data_start + layout[key]["offset"])
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return meta
+
+
+def _read_header(buffer, path):
+    if len(buffer) < PREAMBLE.size:
+        raise IndoorMapArtifactError(f"{path} has no header")
+    magic, header_size = PREAMBLE.unpack_from(buffer)
+    if magic != MAGIC:
+        raise IndoorMapArtifactError(f"{path} has no header")
+    header_end = PREAMBLE.size + header_size
+    try:
+        meta = json.loads(buffer[PREAMBLE.size : header_end])  # noqa: E203
+    except ValueError as e:
+        raise IndoorMapArtifactError(f"{path} has an invalid header: {e}") from e
+    return meta, _aligned(header_end)
+
+
+def load_artifact(path):
+    """
+    Maps an artifact written by ``write_artifact`` into memory, read-only.
+
+    Returns a dictionary of floor name -> FloorGraph whose ``digest`` is the hash of
+    the JSON file it was compiled from. The graphs' arrays are views of the mapped
+    file, so every worker loading the same artifact shares one copy of them through
+    the page cache. Raises IndoorMapArtifactError when the file is unreadable, from
+    another format version or fails its checksum.
+    """
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise IndoorMapArtifactError(f"Can't read {path}: {e}") from e
+
+    meta, data_start = _read_header(buffer, path)
+    if meta.get("version") != ARTIFACT_FORMAT_VERSION:
+        raise IndoorMapArtifactError(
+            f"{path} has format version {meta.get('version')}, "
+            f"expected {ARTIFACT_FORMAT_VERSION}"
+        )
+
+    arrays = {}
+    try:
+        for key, spec in meta["arrays"].items():
+            shape = tuple(spec["shape"])
+            arrays[key] = np.frombuffer(
+                buffer,
+                dtype=np.dtype(spec["dtype"]),
+                count=prod(shape),
+                offset=data_start + spec["offset"],
+            ).reshape(shape)
+    except (KeyError, TypeError, ValueError) as e:
+        raise IndoorMapArtifactError(f"{path} is truncated: {e}") from e
+    if meta.get("checksum") != artifact_checksum(arrays):
+        raise IndoorMapArtifactError(f"{path} failed its checksum")
+
+    per_floor = {name: {} for name in meta["sources"]}
+    try:
+        for key, array in arrays.items():
+            name, _, field = key.partition("/")
+            per_floor[name][field] = array
+        return {
+            name: FloorGraph.from_arrays(name, per_floor[name], digest)
+            for name, digest in meta["sources"].items()
+        }
+    except KeyError as e:
+        raise IndoorMapArtifactError(f"{path} is missing {e}") from e
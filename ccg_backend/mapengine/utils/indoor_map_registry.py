@@ -0,0 +1,295 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+from types import MappingProxyType
+
+from ..constants import (
+    INDOOR_MAPS_ARTIFACT,
+    INDOOR_MAPS_CHECK_INTERVAL,
+    INDOOR_MAPS_PRELOAD,
+    INDOOR_MAPS_WATCH,
+    INDOOR_MAPS_WATCH_INTERVAL,
+)
+from ..exceptions import IndoorMapArtifactError
+from .indoor_building_graph import BuildingGraph
+from .indoor_graph import CONNECTOR_TYPES, FloorGraph
+from .indoor_map_artifact import ARTIFACT_NAME, load_artifact, source_digest
+from .indoor_room_index import RoomIndex
+from .indoor_room_search import RoomSearchIndex
+
+logger = logging.getLogger(__name__)
+
+# resolved from the app directory so loading doesn't depend on the worker's CWD
+INDOOR_MAPS_DIR = Path(__file__).resolve().parent.parent / "fixtures" / "IndoorMaps"
+FLOOR_CONNECTION_GRAPH = "floor_connection_graph"
+
+
+class IndoorMapSnapshot:
+    """Immutable set of floor graphs served to requests; replaced as a whole on reload."""
+
+    def __init__(self, floors, floor_connection_graph, version):
+        self.floors = MappingProxyType(floors)
+        self.floor_connection_graph = floor_connection_graph
+        self.version = version
+        # one layered graph of all floors per accessibility mode, keyed by connector type
+        self.building_graphs = {
+            connector_type: BuildingGraph(
+                floors, floor_connection_graph, connector_type
+            )
+            for connector_type in CONNECTOR_TYPES
+        }
+        self.rooms = RoomIndex(floors)
+        self.room_search = RoomSearchIndex(floors)
+
+    def get_floor(self, floor):
+        return self.floors.get(floor)
+
+    def memory_usage(self):
+        return {floor: graph.memory_usage() for floor, graph in self.floors.items()}
+
+
+# timings of the last reload, in milliseconds
+ReloadStats = namedtuple("ReloadStats", "version changed compile_ms swap_ms")
+
+
+class _MapFile:
+    def __init__(self, stat_key, digest, graph):
+        self.stat_key = stat_key
+        self.digest = digest
+        self.graph = graph
+
+
+class IndoorMapRegistry:
+    """
+    Loads and compiles every ``IndoorMaps`` file once per process.
+
+    Files are re-checked at most every ``check_interval`` seconds (a negative interval
+    disables the checks); a floor is only re-parsed when its mtime/size changed and its
+    content hash differs from the one already compiled. Floors found in the artifact
+    written by ``manage.py compile_indoor_maps`` with a matching source hash are taken
+    from it as is, skipping parsing and table precomputation.
+
+    With ``start_watcher`` the checks move to a background thread instead, so
+    requests never touch the files and edits are swapped in within the watch interval.
+    """
+
+    def __init__(
+        self,
+        maps_dir=INDOOR_MAPS_DIR,
+        check_interval=INDOOR_MAPS_CHECK_INTERVAL,
+        artifact_path=INDOOR_MAPS_ARTIFACT or None,
+    ):
+        self.maps_dir = Path(maps_dir)
+        self.check_interval = check_interval
+        self.artifact_path = Path(artifact_path or self.maps_dir / ARTIFACT_NAME)
+        self._lock = threading.Lock()
+        self._files = {}
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._precompiled = None
+        self._listeners = []
+        self._watcher = None
+        self._stop_watching = None
+        self._watch_interval = None
+        self._fork_hook_registered = False
+        self.last_reload = None
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None or self._is_stale():
+            snapshot = self.refresh()
+        return snapshot
+
+    def get_floor(self, floor):
+        return self.snapshot().get_floor(floor)
+
+    # callback(snapshot) runs every time a new snapshot replaces the current one
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def get_floor_connection_graph(self):
+        return self.snapshot().floor_connection_graph
+
+    def refresh(self, force=False):
+        with self._lock:
+            # another thread may have refreshed while we were waiting for the lock
+            if not force and self._snapshot is not None and not self._is_stale():
+                return self._snapshot
+
+            started = time.perf_counter()
+            changed, compile_ms = self._scan()
+            self._checked_at = time.monotonic()
+            if changed or self._snapshot is None:
+                self._snapshot = self._build_snapshot()
+                self.last_reload = ReloadStats(
+                    self._snapshot.version,
+                    tuple(changed),
+                    compile_ms,
+                    (time.perf_counter() - started) * 1000,
+                )
+                logger.info(
+                    "Indoor maps version %d swapped in after %.1f ms "
+                    "(%d files changed, %.1f ms compiling: %s)",
+                    self.last_reload.version,
+                    self.last_reload.swap_ms,
+                    len(changed),
+                    compile_ms,
+                    ", ".join(changed) or "none",
+                )
+                for callback in self._listeners:
+                    try:
+                        callback(self._snapshot)
+                    except Exception:
+                        logger.exception("Indoor map listener %r failed", callback)
+            return self._snapshot
+
+    def _is_stale(self):
+        # the watcher thread does the checks, requests just use the current snapshot
+        if self.check_interval < 0 or self._watcher is not None:
+            return False
+        return time.monotonic() - self._checked_at >= self.check_interval
+
+    def _scan(self):
+        """Returns the names of the files that changed and the time spent compiling them."""
+        changed = []
+        compile_ms = 0.0
+        seen = set()
+        for path in sorted(self.maps_dir.glob("*.json")):
+            name = path.stem
+            seen.add(name)
+            stat = path.stat()
+            stat_key = (stat.st_mtime_ns, stat.st_size)
+            entry = self._files.get(name)
+            if entry is not None and entry.stat_key == stat_key:
+                continue
+
+            content = path.read_bytes()
+            digest = source_digest(content)
+            if entry is not None and entry.digest == digest:
+                entry.stat_key = stat_key
+                continue
+
+            graph = self._load_precompiled().get(name)
+            if graph is not None and graph.digest == digest:
+                self._files[name] = _MapFile(stat_key, digest, graph)
+                changed.append(name)
+                continue
+
+            try:
+                data = json.loads(content)
+            except json.JSONDecodeError as e:
+                logger.error("Error loading indoor map %s: %s", path.name, e)
+                if entry is None:
+                    self._files[name] = _MapFile(stat_key, None, None)
+                else:
+                    # keep serving the last good version until the file is fixed
+                    entry.stat_key = stat_key
+                continue
+
+            started = time.perf_counter()
+            graph = self._compile(name, data, digest)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            compile_ms += elapsed_ms
+            logger.debug("Compiled indoor map %s in %.1f ms", name, elapsed_ms)
+            self._files[name] = _MapFile(stat_key, digest, graph)
+            changed.append(name)
+
+        for name in sorted(set(self._files) - seen):
+            del self._files[name]
+            changed.append(name)
+        return changed, compile_ms
+
+    def start_watcher(self, interval=INDOOR_MAPS_WATCH_INTERVAL):
+        """
+        Polls the maps directory for edits every ``interval`` seconds from a daemon
+        thread, recompiling the changed floors and swapping in a new snapshot.
+
+        The watcher is restarted in processes forked afterwards (e.g. gunicorn
+        workers with ``--preload``), threads don't survive a fork.
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._watch_interval = interval
+        self._stop_watching = threading.Event()
+        self._watcher = threading.Thread(
+            target=self._watch,
+            args=(self._stop_watching,),
+            name="indoor-maps-watcher",
+            daemon=True,
+        )
+        self._watcher.start()
+        if not self._fork_hook_registered and hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._restart_watcher)
+            self._fork_hook_registered = True
+
+    def stop_watcher(self):
+        if self._watcher is None:
+            return
+        self._stop_watching.set()
+        self._watcher.join()
+        self._watcher = None
+
+    def _watch(self, stop):
+        while not stop.wait(self._watch_interval):
+            try:
+                self.refresh(force=True)
+            except Exception:
+                logger.exception("Indoor maps watcher failed to reload")
+
+    def _restart_watcher(self):
+        if self._watcher is None:
+            return
+        # the parent may have held the lock while forking
+        self._lock = threading.Lock()
+        self._watcher = None
+        self.start_watcher(self._watch_interval)
+
+    # the artifact is read once per process, floors edited since then are recompiled
+    def _load_precompiled(self):
+        if self._precompiled is None:
+            self._precompiled = {}
+            if self.artifact_path.exists():
+                try:
+                    self._precompiled = load_artifact(self.artifact_path)
+                except IndoorMapArtifactError as e:
+                    logger.warning("Ignoring compiled indoor maps: %s", e)
+        return self._precompiled
+
+    @staticmethod
+    def _compile(name, data, digest):
+        return FloorGraph.from_json(name, data, digest)
+
+    def _build_snapshot(self):
+        floors = {}
+        floor_connection_graph = FloorGraph.from_json(FLOOR_CONNECTION_GRAPH, {})
+        for name, entry in self._files.items():
+            if entry.graph is None:
+                continue
+            if name == FLOOR_CONNECTION_GRAPH:
+                floor_connection_graph = entry.graph
+            else:
+                floors[name] = entry.graph
+        version = 1 if self._snapshot is None else self._snapshot.version + 1
+        return IndoorMapSnapshot(floors, floor_connection_graph, version)
+
+
+indoor_map_registry = IndoorMapRegistry()
+
+
+def setup_indoor_maps():
+    """
+    Compiles every floor (or loads it from the artifact) before the first request and
+    starts the watcher when INDOOR_MAPS_WATCH is set.
+
+    Called from the WSGI and ASGI entry points, so only processes serving requests pay
+    for it; management commands (migrate, tests, compile_indoor_maps...) don't, and
+    the runserver autoreloader only imports them in the process it serves from.
+    """
+    if INDOOR_MAPS_PRELOAD or INDOOR_MAPS_WATCH:
+        indoor_map_registry.snapshot()
+    if INDOOR_MAPS_WATCH:
+        indoor_map_registry.start_watcher()
@@ -0,0 +1,110 @@
+from collections import deque, namedtuple
+
+ERROR = "error"
+WARNING = "warning"
+
+MapIssue = namedtuple("MapIssue", "severity floor node message")
+
+# nodes people walk in and out of a floor through
+ENTRY_TYPES = ("stairs", "elevator", "exit", "entrance")
+
+
+def validate_floor(floor, nodes):
+    """
+    Returns the list of issues found in an ``IndoorMaps/<floor>.json`` graph.
+
+    Errors break routing or rendering (missing coordinates or connections, or a node
+    next to a hallway without the two connections its door is drawn between);
+    warnings are tolerated by the compiler but usually point at an editing mistake.
+    """
+    issues = []
+    for node_id, node in nodes.items():
+        if "coords" not in node:
+            issues.append(MapIssue(ERROR, floor, node_id, "missing coords"))
+        if not isinstance(node.get("connections"), list):
+            issues.append(MapIssue(ERROR, floor, node_id, "missing connections"))
+            continue
+        if node.get("id", node_id) != node_id:
+            issues.append(
+                MapIssue(WARNING, floor, node_id, f"id field is '{node['id']}'")
+            )
+        if node.get("type") not in ("corner", "connection") and "pin" not in node:
+            issues.append(MapIssue(WARNING, floor, node_id, "missing pin"))
+        neighbors = [neighbor for neighbor in node["connections"] if neighbor in nodes]
+        if (
+            node.get("type") != "corner"
+            and len(neighbors) < 2
+            and any(nodes[neighbor].get("type") == "corner" for neighbor in neighbors)
+        ):
+            issues.append(
+                MapIssue(ERROR, floor, node_id, "fewer than two hallway connections")
+            )
+        for neighbor in node["connections"]:
+            if neighbor not in nodes:
+                issues.append(
+                    MapIssue(WARNING, floor, node_id, f"dangling connection {neighbor}")
+                )
+            elif node_id not in nodes[neighbor].get("connections", []):
+                issues.append(
+                    MapIssue(
+                        WARNING, floor, node_id, f"asymmetric connection {neighbor}"
+                    )
+                )
+
+    for node_id in unreachable_rooms(nodes):
+        issues.append(
+            MapIssue(WARNING, floor, node_id, "room unreachable from the floor entries")
+        )
+    return issues
+
+
+def validate_floor_connection_graph(floor_graph, floors):
+    issues = []
+    for floor, node in floor_graph.items():
+        if floor != "Outside" and floor not in floors:
+            issues.append(MapIssue(ERROR, floor, None, "floor has no IndoorMaps file"))
+        for neighbor in node.get("connections", []):
+            if neighbor not in floor_graph:
+                issues.append(
+                    MapIssue(
+                        ERROR, floor, None, f"dangling floor connection {neighbor}"
+                    )
+                )
+    return issues
+
+
+# rooms that can't be walked to from any entry point or can't walk back to one
+def unreachable_rooms(nodes):
+    entries = [
+        node_id for node_id, node in nodes.items() if node.get("type") in ENTRY_TYPES
+    ]
+    if not entries:
+        return []
+
+    forward = {node_id: [] for node_id in nodes}
+    backward = {node_id: [] for node_id in nodes}
+    for node_id, node in nodes.items():
+        for neighbor in node.get("connections") or []:
+            if neighbor in nodes:
+                forward[node_id].append(neighbor)
+                backward[neighbor].append(node_id)
+
+    reached = _reachable(entries, forward)
+    reaching = _reachable(entries, backward)
+    return [
+        node_id
+        for node_id, node in nodes.items()
+        if node.get("type") == "room"
+        and (node_id not in reached or node_id not in reaching)
+    ]
+
+
+def _reachable(sources, adjacency):
+    seen = set(sources)
+    queue = deque(sources)
+    while queue:
+        for neighbor in adjacency[queue.popleft()]:
+            if neighbor not in seen:
+                seen.add(neighbor)
+                queue.append(neighbor)
+    return seen
@@ -0,0 +1,70 @@
+import math
+
+
+def _xy(point):
+    return point["x"], point["y"]
+
+
+def remove_redundant_points(coords):
+    """
+    Drops repeated points and points in the middle of a straight segment.
+
+    Lossless: the polyline drawn from the result is the same as the input one. A
+    point where the path turns back on itself is kept.
+    """
+    points = []
+    for point in coords:
+        if points and _xy(points[-1]) == _xy(point):
+            continue
+        if len(points) >= 2:
+            (ax, ay), (bx, by), (cx, cy) = _xy(points[-2]), _xy(points[-1]), _xy(point)
+            collinear = (bx - ax) * (cy - by) == (by - ay) * (cx - bx)
+            same_direction = (bx - ax) * (cx - bx) + (by - ay) * (cy - by) > 0
+            if collinear and same_direction:
+                points[-1] = point
+                continue
+        points.append(point)
+    return points
+
+
+def _distance_to_segment(point, a, b):
+    (px, py), (ax, ay), (bx, by) = _xy(point), _xy(a), _xy(b)
+    abx, aby = bx - ax, by - ay
+    ab_squared = abx * abx + aby * aby
+    if ab_squared == 0:
+        return math.hypot(px - ax, py - ay)
+    t = max(0, min(1, ((px - ax) * abx + (py - ay) * aby) / ab_squared))
+    return math.hypot(px - ax - t * abx, py - ay - t * aby)
+
+
+def douglas_peucker(coords, tolerance):
+    """
+    Ramer–Douglas–Peucker simplification, keeps the end points.
+
+    Every dropped point is within ``tolerance`` map units of the simplified path.
+    """
+    if len(coords) <= 2:
+        return list(coords)
+    keep = [False] * len(coords)
+    keep[0] = keep[-1] = True
+    # iterative so long paths can't hit the recursion limit
+    stack = [(0, len(coords) - 1)]
+    while stack:
+        first, last = stack.pop()
+        farthest, max_distance = None, tolerance
+        for i in range(first + 1, last):
+            distance = _distance_to_segment(coords[i], coords[first], coords[last])
+            if distance > max_distance:
+                farthest, max_distance = i, distance
+        if farthest is not None:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return [point for point, kept in zip(coords, keep) if kept]
+
+
+def simplify_path(coords, tolerance=0):
+    coords = remove_redundant_points(coords)
+    if tolerance > 0:
+        coords = douglas_peucker(coords, tolerance)
+    return coords
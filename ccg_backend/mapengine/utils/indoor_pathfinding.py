@@ -0,0 +1,259 @@
+import heapq
+import math
+import time
+from functools import partial
+from itertools import count
+
+import numpy as np
+
+from .indoor_graph import UNREACHABLE, FloorGraph
+
+
+# straight-line distance between two nodes, hop count for graphs without coordinates
+def edge_weight(map_data, a, b):
+    if "coords" not in map_data[a] or "coords" not in map_data[b]:
+        return 1.0
+    a, b = map_data[a]["coords"], map_data[b]["coords"]
+    return math.hypot(a["x"] - b["x"], a["y"] - b["y"])
+
+
+# compiled floors are used as is, plain dictionaries (e.g. in tests) are compiled first,
+# without all-pairs tables: they would cost a search per node for a single query
+def as_floor_graph(map_data):
+    if isinstance(map_data, FloorGraph):
+        return map_data
+    return FloorGraph.from_json("", map_data, all_pairs_max_bytes=0)
+
+
+# rebuilds the index list by following parent pointers back from a search state
+def reconstruct_path(parents, state, n):
+    path = []
+    while state != -1:
+        path.append(state % n)
+        state = parents[state]
+    path.reverse()
+    return path
+
+
+def settle(graph, source, heuristic=None):
+    """
+    Best-first search over the ``search_lists`` of a compiled floor (or building) graph.
+
+    ``source`` is a node index or a list of them, searched from at once. Yields
+    ``(node, cost, path)`` for every node the first time it is settled, before its
+    edges are relaxed; ``path()`` then returns its shortest path, from the closest
+    source. Without a heuristic this is Dijkstra, with a consistent one (a list of
+    per-node lower bounds) it is A*.
+
+    Routes only walk through the graph's ``transit`` (hallway) nodes: a room,
+    stairwell or exit entered from its own floor is a dead end except for the
+    ``crossings`` edges to another floor, so routes take stairwells and exits but
+    never cut through a classroom. Those nodes are searched in two states, entered
+    from their floor or not, for paths to stay shortest, and a crossing never leads
+    straight back to the node it was entered from.
+    """
+    n = len(graph)
+    indptr, indices, weights, transit, crossings = graph.search_lists
+    # state node + n: a place entered from its own floor, only crossings leave it;
+    # dictionaries, as targeted searches only reach a small part of the graph
+    costs = {}
+    parents = {}
+    closed = set()
+    settled = set()
+
+    tie = count()
+    heap = []
+    for start in source if isinstance(source, list) else [source]:
+        costs[start] = 0.0
+        parents[start] = -1
+        heap.append((0.0, next(tie), start))
+
+    while heap:
+        _, _, state = heapq.heappop(heap)
+        if state in closed:
+            continue
+        node = state % n
+        if node not in settled:
+            settled.add(node)
+            yield node, costs[state], partial(reconstruct_path, parents, state, n)
+        closed.add(state)
+
+        start, end = indptr[node], indptr[node + 1]
+        changes_floor = (
+            [False] * (end - start) if crossings is None else crossings[start:end]
+        )
+        if state >= n and not any(changes_floor):
+            continue
+        # going straight back to the previous floor would only reset the state
+        previous = -1 if parents[state] == -1 else parents[state] % n
+        for neighbor, weight, crossing in zip(
+            indices[start:end], weights[start:end], changes_floor
+        ):
+            if (crossing and neighbor == previous) or (state >= n and not crossing):
+                continue
+            next_state = neighbor if transit[neighbor] or crossing else neighbor + n
+            if next_state in closed:
+                continue
+            cost = costs[state] + weight
+            if cost < costs.get(next_state, math.inf):
+                estimate = cost + heuristic[neighbor] if heuristic else cost
+                # no way to the goal from there
+                if estimate == math.inf:
+                    continue
+                costs[next_state] = cost
+                parents[next_state] = state
+                heapq.heappush(heap, (estimate, next(tie), next_state))
+
+
+def search(graph, source, is_goal, heuristic=None):
+    """
+    Returns the list of node indices from source (or the closest of a list of sources)
+    to the first settled node for which ``is_goal`` is true, or None.
+    """
+    for node, _, path in settle(graph, source, heuristic):
+        if is_goal(node):
+            return path()
+    return None
+
+
+def k_nearest(graph, source, is_goal, k):
+    """
+    Dijkstra from source until k goal nodes are settled.
+
+    Returns up to k ``(node, cost, path)`` tuples, closest first, from a single pass
+    instead of one search per goal.
+    """
+    found = []
+    if k <= 0:
+        return found
+    for node, cost, path in settle(graph, source):
+        if is_goal(node):
+            found.append((node, cost, path()))
+            if len(found) == k:
+                break
+    return found
+
+
+def path_cost(graph, path):
+    cost = 0.0
+    for node, neighbor in zip(path, path[1:]):
+        start, end = graph.indptr[node], graph.indptr[node + 1]
+        targets = graph.indices[start:end]
+        cost += float(graph.weights[start:end][targets == neighbor].min())
+    return cost
+
+
+# Dijkstra that can't enter blocked nodes nor use blocked (node, neighbor) edges
+def _spur_search(graph, source, target, blocked_nodes, blocked_edges):
+    for node, cost, path in settle(
+        _Restricted(graph, blocked_nodes, blocked_edges), source
+    ):
+        if node == target:
+            return path(), cost
+    return None, math.inf
+
+
+class _Restricted:
+    """CSR view of a graph without some nodes and edges, built per spur search."""
+
+    def __init__(self, graph, blocked_nodes, blocked_edges):
+        self._len = len(graph)
+        weights = graph.weights.copy()
+        for node, neighbor in blocked_edges:
+            start, end = graph.indptr[node], graph.indptr[node + 1]
+            targets = graph.indices[start:end]
+            weights[start:end][targets == neighbor] = math.inf
+        if blocked_nodes:
+            weights[np.isin(graph.indices, list(blocked_nodes))] = math.inf
+        self.search_lists = graph.search_lists._replace(weights=weights.tolist())
+
+    def __len__(self):
+        return self._len
+
+
+def k_shortest_paths(
+    graph, source, target, k, time_budget=None, blocked_nodes=frozenset()
+):
+    """
+    Yen's algorithm: up to k loopless paths from source to target, shortest first.
+
+    Returns ``(cost, path)`` tuples, none of them going through ``blocked_nodes``.
+    Every spur search runs on the same CSR arrays with the removed nodes/edges
+    weighted as impassable; once ``time_budget`` seconds are spent the paths found so
+    far are returned.
+    """
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    blocked_nodes = set(blocked_nodes) - {source, target}
+    first, cost = _spur_search(graph, source, target, blocked_nodes, ())
+    if first is None or math.isinf(cost) or k <= 0:
+        return []
+    found = [(cost, first)]
+    candidates = []
+    seen = {tuple(first)}
+    tie = count()
+
+    while len(found) < k:
+        _, previous = found[-1]
+        for i in range(len(previous) - 1):
+            if deadline is not None and time.monotonic() > deadline:
+                return found
+            root = previous[: i + 1]
+            blocked_edges = {
+                (path[i], path[i + 1])
+                for _, path in found
+                if len(path) > i + 1 and path[: i + 1] == root
+            }
+            spur, spur_cost = _spur_search(
+                graph, root[-1], target, blocked_nodes.union(root[:-1]), blocked_edges
+            )
+            if spur is None or math.isinf(spur_cost):
+                continue
+            path = root[:-1] + spur
+            if tuple(path) in seen:
+                continue
+            seen.add(tuple(path))
+            heapq.heappush(
+                candidates,
+                (path_cost(graph, root) + spur_cost, next(tie), path),
+            )
+        if not candidates:
+            break
+        cost, _, path = heapq.heappop(candidates)
+        found.append((cost, path))
+    return found
+
+
+def astar_indices(graph, source, target):
+    heuristic = graph.distances_to(target).tolist()
+    return search(graph, source, lambda node: node == target, heuristic)
+
+
+# reconstructs a route by walking the precomputed next-hop matrix, no search involved
+def all_pairs_path(graph, source, target):
+    next_hop = graph.all_pairs.next_hop
+    if next_hop[source, target] == UNREACHABLE:
+        return None
+    path = [source]
+    while path[-1] != target:
+        path.append(int(next_hop[path[-1], target]))
+    return path
+
+
+def astar(map_data, start, destination):
+    """
+    Returns the shortest sequence of nodes from start to destination, or None.
+
+    Edges are weighted by the euclidean distance between the nodes' ``coords`` and the
+    straight-line distance to the destination is used as the (admissible) heuristic.
+    Graphs without coordinates, like the floor connection graph, fall back to hop count.
+    Floors compiled with all-pairs tables are answered from them instead.
+    """
+    graph = as_floor_graph(map_data)
+    if start not in graph.index or destination not in graph.index:
+        return None
+    source, target = graph.index[start], graph.index[destination]
+    if graph.all_pairs is not None:
+        path = all_pairs_path(graph, source, target)
+    else:
+        path = astar_indices(graph, source, target)
+    return None if path is None else [graph.ids[i] for i in path]
@@ -0,0 +1,57 @@
+import re
+from collections import namedtuple
+
+from ..exceptions import RoomNotFoundError
+
+RoomLocation = namedtuple("RoomLocation", "building floor")
+
+# floor IDs are a building code followed by the floor number, e.g. H8, MB1 or MBS2
+FLOOR_ID = re.compile(r"^([A-Z]+?)(S?\d+)$")
+
+
+def building_of(floor):
+    match = FLOOR_ID.match(floor)
+    return match.group(1) if match else floor
+
+
+class RoomIndex:
+    """
+    Exact room ID -> (building, floor) index over every compiled floor.
+
+    Built once per map snapshot from the node IDs of all floors, so a lookup is a
+    single hash of the ID instead of a prefix scan over the floors. IDs found on more
+    than one floor (``Exit``, ``S1``, corners...) don't identify a floor and are left
+    out; floor IDs resolve to themselves.
+    """
+
+    def __init__(self, floors):
+        self._locations = {
+            floor: RoomLocation(building_of(floor), floor) for floor in floors
+        }
+        self.ambiguous = set()
+        for floor, graph in floors.items():
+            location = self._locations[floor]
+            for node_id in graph.ids:
+                if node_id in self.ambiguous or node_id in floors:
+                    continue
+                known = self._locations.setdefault(node_id, location)
+                if known != location:
+                    del self._locations[node_id]
+                    self.ambiguous.add(node_id)
+
+    def get(self, room):
+        return self._locations.get(room)
+
+    def resolve(self, room):
+        location = self._locations.get(room)
+        if location is None:
+            if room in self.ambiguous:
+                raise RoomNotFoundError(f"Room '{room}' is on more than one floor")
+            raise RoomNotFoundError(f"Room '{room}' not found")
+        return location
+
+    def __contains__(self, room):
+        return room in self._locations
+
+    def __len__(self):
+        return len(self._locations)
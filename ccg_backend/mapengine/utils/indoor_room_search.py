@@ -0,0 +1,119 @@
+import re
+from collections import defaultdict, namedtuple
+
+from .indoor_room_index import building_of
+
+# node types users search for, corners/stairs/exits are only routing nodes
+SEARCHABLE_TYPES = ("room", "water-closet")
+# most results per query, every trie node keeps that many of its best entries
+MAX_RESULTS = 20
+NGRAM = 2
+
+SearchEntry = namedtuple("SearchEntry", "id type building floor pin key")
+
+
+# "mb1.210", "MB-1 210" and "MB1.210" all become "MB1210"
+def normalize(text):
+    return re.sub(r"[^0-9A-Z]", "", text.upper())
+
+
+def ngrams(key):
+    if len(key) <= NGRAM:
+        return {key} if key else set()
+    return {key[i:][:NGRAM] for i in range(len(key) - NGRAM + 1)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "best")
+
+    def __init__(self):
+        self.children = {}
+        # entry indices under this prefix, best ranked first
+        self.best = []
+
+
+class RoomSearchIndex:
+    """
+    Autocomplete index over the rooms and facilities of every floor.
+
+    Queries are normalized (case and punctuation are ignored) and answered from a
+    prefix trie whose nodes keep their best ranked entries, so a lookup costs
+    O(len(query)) no matter how many rooms there are. Queries that aren't a prefix of
+    any ID (``867``, ``MB210``) fall back to ranking entries by the character bigrams
+    they share with the query.
+    """
+
+    def __init__(self, floors):
+        self.entries = []
+        for floor in sorted(floors):
+            graph = floors[floor]
+            building = building_of(floor)
+            for type_name in SEARCHABLE_TYPES:
+                for index in graph.nodes_of_type(type_name):
+                    node_id = graph.ids[index]
+                    pin = graph[node_id].get("pin")
+                    self.entries.append(
+                        SearchEntry(
+                            node_id,
+                            type_name,
+                            building,
+                            floor,
+                            [pin["x"], pin["y"]] if pin else None,
+                            normalize(node_id),
+                        )
+                    )
+        # shorter IDs first, so "H8" ranks H801 before H801-1
+        self.entries.sort(key=lambda entry: (len(entry.key), entry.key, entry.floor))
+
+        self._root = _TrieNode()
+        self._ngrams = defaultdict(list)
+        for position, entry in enumerate(self.entries):
+            # rooms are also found with their building code, e.g. MBS2 room S2.105
+            keys = {entry.key}
+            if not entry.key.startswith(entry.building):
+                keys.add(normalize(entry.building) + entry.key)
+            for key in keys:
+                self._insert(key, position)
+            for gram in ngrams(entry.key):
+                self._ngrams[gram].append(position)
+
+    def _insert(self, key, position):
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            # entries are inserted in rank order, so the first ones are the best
+            if len(node.best) < MAX_RESULTS and position not in node.best:
+                node.best.append(position)
+
+    def _prefix_matches(self, key, limit):
+        node = self._root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.best[:limit]
+
+    def _ngram_matches(self, key, limit, exclude):
+        grams = ngrams(key)
+        scores = defaultdict(int)
+        for gram in grams:
+            for position in self._ngrams.get(gram, ()):
+                scores[position] += 1
+        # at least half of the query's bigrams have to be in the ID
+        threshold = (len(grams) + 1) // 2
+        ranked = sorted(
+            (-score, position)
+            for position, score in scores.items()
+            if score >= threshold and position not in exclude
+        )
+        return [position for _, position in ranked[:limit]]
+
+    def search(self, query, limit=10):
+        key = normalize(query)
+        limit = max(0, min(limit, MAX_RESULTS))
+        if not key or not limit:
+            return []
+        positions = self._prefix_matches(key, limit)
+        if len(positions) < limit:
+            positions += self._ngram_matches(key, limit - len(positions), positions)
+        return [self.entries[position] for position in positions]
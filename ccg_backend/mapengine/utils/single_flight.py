@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import weakref
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls sharing a key.
+
+    The first caller of a key (the leader) runs the function; callers arriving with
+    the same key while it runs wait for it and get its result, or its exception,
+    instead of running the function again. Once the leader is done the key is free
+    and the next call runs the function anew. Followers are counted for metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class _AsyncCall:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutine functions, awaited instead of blocking a thread.
+
+    The first ``do`` of a key runs ``function()`` as a task of the running event loop;
+    calls arriving with the same key while it runs await that task too. Futures belong
+    to their loop, so calls are coalesced per loop (there is a dict of keys per loop).
+    A waiter being cancelled doesn't cancel the call for the others; the call is only
+    cancelled once nobody waits for it any more.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = weakref.WeakKeyDictionary()
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key, function):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            calls = self._calls.setdefault(loop, {})
+            call = calls.get(key)
+            if call is None:
+                call = calls[key] = _AsyncCall(asyncio.ensure_future(function()))
+                call.task.add_done_callback(lambda task: self._forget(calls, key, call))
+                self.leaders += 1
+            else:
+                self.followers += 1
+            call.waiters += 1
+
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            call.waiters -= 1
+            if call.waiters == 0:
+                call.task.cancel()
+            raise
+
+    def _forget(self, calls, key, call):
+        with self._lock:
+            if calls.get(key) is call:
+                del calls[key]
+
+    def in_flight(self):
+        with self._lock:
+            return sum(len(calls) for calls in self._calls.values())
@@ -9,6 +9,7 @@ from .direction_api_views import (
     wheelchair_directions,
 )
 from .point_of_interest_views import get_all_categories, get_points_of_interest
+from .room_views import search_rooms
 from .route_views import route_list_create
 from .service_views import get_all_services, get_services_by_building
 from .shuttle_views import get_shuttle_stops, get_upcoming_sheduled_shuttle
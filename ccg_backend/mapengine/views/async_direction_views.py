@@ -0,0 +1,136 @@
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+
+from ..constants import SHUTTLE_DIRECTIONS_DEADLINE
+from ..exceptions.exceptions import (
+    BuildingNotFoundError,
+    InvalidCoordinatesError,
+    ShuttleStopNotFoundError,
+)
+from ..models.building import Building
+from ..models.shuttle import ShuttleStop
+from ..utils.async_direction_api_utils import (
+    cached_directions_async,
+    fetch_ors_legs_async,
+)
+from .direction_api_views import (
+    DIRECTION_PROFILES,
+    SHUTTLE_LEG_ERRORS,
+    build_combined_route,
+    parse_coordinates,
+)
+
+
+@require_http_methods(["GET"])
+async def async_directions(request, profile):
+    """
+    Async variant of the ``/directions/<profile>`` endpoints, same parameters and
+    responses.
+
+    Waiting on ORS/OTP doesn't hold a worker thread, so a single process served by an
+    ASGI server (``concordia_campus_guide_backend.asgi``) keeps hundreds of direction
+    requests in flight.
+    """
+    if profile not in DIRECTION_PROFILES:
+        return JsonResponse({"error": f"Unknown profile '{profile}'"}, status=404)
+    if profile == "concordia-shuttle":
+        return await async_multi_modal_shuttle_directions(request)
+
+    start = request.GET.get("start")
+    end = request.GET.get("end")
+    if not start or not end:
+        return JsonResponse({"error": "Missing start or end parameter"}, status=400)
+    route_info, code = await cached_directions_async(start, end, profile)
+    return JsonResponse(route_info, status=code)
+
+
+async def find_nearest_building_async(point):
+    building = await (
+        Building.objects.annotate(distance=Distance("location", point))
+        .order_by("distance")
+        .afirst()
+    )
+
+    if not building:
+        raise BuildingNotFoundError("No nearby building found for the given location.")
+
+    return building
+
+
+async def get_shuttle_stops_async(origin_campus, destination_campus):
+    """Retrieves the shuttle stops for the given campuses."""
+    try:
+        return (
+            await ShuttleStop.objects.aget(name=origin_campus),
+            await ShuttleStop.objects.aget(name=destination_campus),
+        )
+    except ShuttleStop.DoesNotExist:
+        raise ShuttleStopNotFoundError(
+            "Shuttle stop not found for one or both campuses."
+        )
+
+
+async def async_multi_modal_shuttle_directions(request):
+    """Async version of multi_modal_shuttle_directions, same legs and responses."""
+    start = request.GET.get("start")
+    end = request.GET.get("end")
+
+    try:
+        coordinates = parse_coordinates(start, end)
+    except InvalidCoordinatesError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    (start_lon, start_lat), (end_lon, end_lat) = coordinates
+
+    try:
+        origin_building = await find_nearest_building_async(
+            Point(start_lon, start_lat, srid=4326)
+        )
+        destination_building = await find_nearest_building_async(
+            Point(end_lon, end_lat, srid=4326)
+        )
+    except BuildingNotFoundError as e:
+        return JsonResponse({"error": str(e)}, status=404)
+
+    origin_campus, destination_campus = (
+        origin_building.campus,
+        destination_building.campus,
+    )
+    if origin_campus == destination_campus:
+        route_info, code = await cached_directions_async(start, end, "foot-walking")
+        return JsonResponse(route_info, status=code)
+
+    try:
+        origin_stop, destination_stop = await get_shuttle_stops_async(
+            origin_campus, destination_campus
+        )
+    except ShuttleStopNotFoundError as e:
+        return JsonResponse({"error": str(e)}, status=404)
+
+    origin_stop_coord = f"{origin_stop.longitude},{origin_stop.latitude}"
+    destination_stop_coord = f"{destination_stop.longitude},{destination_stop.latitude}"
+    legs = {
+        "walk_to_stop": (start, origin_stop_coord, "foot-walking"),
+        "shuttle_ride": (origin_stop_coord, destination_stop_coord, "driving-car"),
+        "walk_from_stop": (destination_stop_coord, end, "foot-walking"),
+    }
+    responses = await fetch_ors_legs_async(legs, SHUTTLE_DIRECTIONS_DEADLINE)
+    for name in legs:
+        if name in responses and responses[name][1] != 200:
+            return JsonResponse(
+                {"error": SHUTTLE_LEG_ERRORS[name]}, status=responses[name][1]
+            )
+    if len(responses) < len(legs):
+        return JsonResponse(
+            {"error": "Timed out fetching the shuttle route directions."}, status=504
+        )
+
+    combined_route = build_combined_route(
+        {name: responses[name][0] for name in legs},
+        origin_building,
+        destination_building,
+        origin_campus,
+        destination_campus,
+    )
+    return JsonResponse(combined_route, status=200)
@@ -4,6 +4,7 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from rest_framework.decorators import api_view
 
+from ..constants import SHUTTLE_DIRECTIONS_DEADLINE
 from ..exceptions.exceptions import (
     BuildingNotFoundError,
     InvalidCoordinatesError,
@@ -12,10 +13,25 @@ from ..exceptions.exceptions import (
 from ..models.building import Building
 from ..models.shuttle import ShuttleStop
 from ..utils.direction_api_utils import (
+    cached_directions,
     compute_bbox_from_steps,
-    ors_directions,
-    otp_directions,
+    fetch_ors_legs,
 )
+from ..utils.directions_cache import directions_cache
+
+DIRECTION_PROFILES = [
+    "foot-walking",
+    "cycling-regular",
+    "driving-car",
+    "wheelchair",
+    "public-transport",
+    "concordia-shuttle",
+]
+SHUTTLE_LEG_ERRORS = {
+    "walk_to_stop": "Error fetching walking directions for leg 1.",
+    "shuttle_ride": "Error fetching shuttle ride directions for leg 2.",
+    "walk_from_stop": "Error fetching walking directions for leg 3.",
+}
 
 
 @api_view(["GET"])
@@ -57,18 +73,13 @@ def shuttle_bus_directions(request):
 @api_view(["GET"])
 @require_http_methods(["GET"])
 def get_profiles(_):
-    return JsonResponse(
-        {
-            "profiles": [
-                "foot-walking",
-                "cycling-regular",
-                "driving-car",
-                "wheelchair",
-                "public-transport",
-                "concordia-shuttle",
-            ]
-        }
-    )
+    return JsonResponse({"profiles": DIRECTION_PROFILES})
+
+
+@api_view(["GET"])
+@require_http_methods(["GET"])
+def get_directions_cache_stats(_):
+    return JsonResponse(directions_cache.stats())
 
 
 def get_directions(request, profile):
@@ -77,16 +88,7 @@ def get_directions(request, profile):
 
     if not start or not end:
         return JsonResponse({"error": "Missing start or end parameter"}, status=400)
-    if profile in [
-        "foot-walking",
-        "cycling-regular",
-        "driving-car",
-        "wheelchair",
-        "concordia-shuttle",
-    ]:
-        route_info, code = ors_directions(start, end, profile)
-    else:
-        route_info, code = otp_directions(start, end)
+    route_info, code = cached_directions(start, end, profile)
     return JsonResponse(route_info, status=code)
 
 
@@ -164,6 +166,7 @@ def multi_modal_shuttle_directions(request):
          - Leg 1: Walk (foot-walking) from the origin to the origin campus shuttle stop.
          - Leg 2: Shuttle ride (simulated with 'driving-car') from the origin stop to the destination stop.
          - Leg 3: Walk (foot-walking) from the destination shuttle stop to the final destination.
+      The three legs are fetched concurrently, within SHUTTLE_DIRECTIONS_DEADLINE seconds.
 
     Expects the following GET parameters:
       - start: A string in the format "longitude,latitude" for the origin.
@@ -208,32 +211,25 @@ def multi_modal_shuttle_directions(request):
     origin_stop_coord = f"{origin_stop.longitude},{origin_stop.latitude}"
     destination_stop_coord = f"{destination_stop.longitude},{destination_stop.latitude}"
 
-    # Leg 1: Walk from origin to the origin campus shuttle stop (foot-walking)
-    leg1_response, code1 = ors_directions(start, origin_stop_coord, "foot-walking")
-    if code1 != 200:
-        return JsonResponse(
-            {"error": "Error fetching walking directions for leg 1."}, status=code1
-        )
-
-    # Leg 2: Shuttle ride from origin stop to destination stop (simulate with 'driving-car')
-    leg2_response, code2 = ors_directions(
-        origin_stop_coord, destination_stop_coord, "driving-car"
-    )
-    if code2 != 200:
-        return JsonResponse(
-            {"error": "Error fetching shuttle ride directions for leg 2."}, status=code2
-        )
-    # Leg 3: Walk from destination shuttle stop to final destination (foot-walking)
-    leg3_response, code3 = ors_directions(destination_stop_coord, end, "foot-walking")
-    if code3 != 200:
+    legs = {
+        # Leg 1: Walk from origin to the origin campus shuttle stop (foot-walking)
+        "walk_to_stop": (start, origin_stop_coord, "foot-walking"),
+        # Leg 2: Shuttle ride from origin stop to destination stop (simulate with 'driving-car')
+        "shuttle_ride": (origin_stop_coord, destination_stop_coord, "driving-car"),
+        # Leg 3: Walk from destination shuttle stop to final destination (foot-walking)
+        "walk_from_stop": (destination_stop_coord, end, "foot-walking"),
+    }
+    responses = fetch_ors_legs(legs, SHUTTLE_DIRECTIONS_DEADLINE)
+    for name in legs:
+        if name in responses and responses[name][1] != 200:
+            return JsonResponse(
+                {"error": SHUTTLE_LEG_ERRORS[name]}, status=responses[name][1]
+            )
+    if len(responses) < len(legs):
         return JsonResponse(
-            {"error": "Error fetching walking directions for leg 3."}, status=code3
+            {"error": "Timed out fetching the shuttle route directions."}, status=504
         )
-    route_legs = {
-        "walk_to_stop": leg1_response,
-        "shuttle_ride": leg2_response,
-        "walk_from_stop": leg3_response,
-    }
+    route_legs = {name: responses[name][0] for name in legs}
     combined_route = build_combined_route(
         route_legs,
         origin_building,
@@ -0,0 +1,129 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+from rest_framework.decorators import api_view
+
+from ..exceptions.exceptions import (
+    BuildingNotFoundError,
+    IndoorMapRenderError,
+    RoomNotFoundError,
+)
+from ..models.building import Building
+from ..utils.direction_api_utils import cached_directions
+from ..utils.indoor_direction_api_utils import (
+    IndoorRoutingContext,
+    get_building_exit_data,
+    get_indoor_directions_data,
+)
+
+
+@api_view(["GET"])
+@require_http_methods(["GET"])
+def get_door_to_door_directions(request):
+    """
+    One itinerary from a room to a room in another building: indoor directions to the
+    closest exit, outdoor directions between the two buildings and indoor directions
+    from the closest exit of the destination building.
+
+    The outdoor leg is requested from ORS (``wheelchair`` when ``disabled``,
+    ``foot-walking`` otherwise) on a worker thread while the indoor legs are computed,
+    so the itinerary costs about one upstream round trip; when an indoor leg fails
+    the response doesn't wait for it.
+    """
+    start = request.GET.get("start")
+    destination = request.GET.get("destination")
+    disabled = request.GET.get("disabled")
+    if not start or not destination:
+        return JsonResponse(
+            {"error": "Missing start or destination parameter"}, status=400
+        )
+
+    context = IndoorRoutingContext(disabled)
+    try:
+        origin = context.snapshot.rooms.resolve(start)
+        target = context.snapshot.rooms.resolve(destination)
+    except RoomNotFoundError as e:
+        return JsonResponse({"error": str(e)}, status=404)
+
+    # rooms of the same building are linked indoors, no need to go out
+    if origin.building == target.building:
+        try:
+            data = get_indoor_directions_data(start, destination, disabled, context)
+        except IndoorMapRenderError as e:
+            return JsonResponse({"error": str(e)}, status=422)
+        return JsonResponse(
+            {
+                "origin_building": origin.building,
+                "destination_building": target.building,
+                "legs": {"indoor": data or {}},
+            }
+        )
+
+    try:
+        origin_building, destination_building = get_buildings(
+            origin.building, target.building
+        )
+    except BuildingNotFoundError as e:
+        return JsonResponse({"error": str(e)}, status=404)
+    profile = "wheelchair" if context.disabled else "foot-walking"
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    outdoor = executor.submit(
+        cached_directions,
+        location_param(origin_building),
+        location_param(destination_building),
+        profile,
+    )
+    try:
+        exit_leg = get_building_exit_data(start, disabled, True, context)
+        entrance_leg = get_building_exit_data(destination, disabled, False, context)
+        for leg, building in (
+            (exit_leg, origin.building),
+            (entrance_leg, target.building),
+        ):
+            if leg is None:
+                return JsonResponse(
+                    {"error": f"No reachable exit in building {building}"}, status=404
+                )
+        outdoor_leg, code = outdoor.result()
+    except IndoorMapRenderError as e:
+        return JsonResponse({"error": str(e)}, status=422)
+    finally:
+        # itineraries failing indoors are answered without waiting for ORS
+        outdoor.cancel()
+        executor.shutdown(wait=False)
+
+    if code != 200:
+        return JsonResponse(outdoor_leg, status=code)
+
+    return JsonResponse(
+        {
+            "origin_building": origin.building,
+            "destination_building": target.building,
+            "total_distance": outdoor_leg["total_distance"],
+            "total_duration": outdoor_leg["total_duration"],
+            "legs": {
+                "indoor_to_exit": exit_leg,
+                "outdoor": outdoor_leg,
+                "indoor_from_entrance": entrance_leg,
+            },
+        }
+    )
+
+
+def get_buildings(*building_codes):
+    """Looks up the Building of every code with a single query, in order."""
+    buildings = {
+        building.building_code: building
+        for building in Building.objects.filter(building_code__in=building_codes)
+    }
+    missing = [code for code in building_codes if code not in buildings]
+    if missing:
+        raise BuildingNotFoundError(f"Building {missing[0]} not found.")
+    return [buildings[code] for code in building_codes]
+
+
+# "lon,lat" as expected by cached_directions
+def location_param(building):
+    return f"{building.location.x},{building.location.y}"
@@ -2,7 +2,19 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from rest_framework.decorators import api_view
 
-from ..utils.indoor_direction_api_utils import get_indoor_directions_data
+from ..constants import (
+    INDOOR_ALTERNATIVES_MAX,
+    INDOOR_DIRECTIONS_BATCH_MAX,
+    INDOOR_NEAREST_MAX_RESULTS,
+)
+from ..exceptions.exceptions import IndoorMapRenderError, RoomNotFoundError
+from ..utils.indoor_direction_api_utils import (
+    PATH_FORMATS,
+    IndoorRoutingContext,
+    get_cached_indoor_directions_data,
+    get_indoor_directions_batch,
+    get_nearest_facilities_data,
+)
 
 
 @api_view(["GET"])
@@ -11,8 +23,129 @@ def get_indoor_directions(request):
     start = request.GET.get("start")
     destination = request.GET.get("destination")
     disabled = request.GET.get("disabled")
-    data = get_indoor_directions_data(start, destination, disabled)
+    if not start or not destination:
+        return JsonResponse(
+            {"error": "Missing start or destination parameter"}, status=400
+        )
+    try:
+        path_format, tolerance = parse_path_options(request.GET)
+        alternatives = int(request.GET.get("alternatives") or 0)
+        if not 0 <= alternatives <= INDOOR_ALTERNATIVES_MAX:
+            raise ValueError(
+                f"alternatives must be between 0 and {INDOOR_ALTERNATIVES_MAX}"
+            )
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    try:
+        data = get_cached_indoor_directions_data(
+            start,
+            destination,
+            disabled,
+            path_format=path_format,
+            tolerance=tolerance,
+            alternatives=alternatives,
+        )
+    except RoomNotFoundError as e:
+        return JsonResponse({"error": str(e)}, status=404)
+    except IndoorMapRenderError as e:
+        return JsonResponse({"error": str(e)}, status=422)
     if data is not None:
         return JsonResponse(data)
     else:
         return JsonResponse({})
+
+
+@api_view(["POST"])
+@require_http_methods(["POST"])
+def get_indoor_directions_batch_view(request):
+    """
+    Indoor directions for many routes in one call, e.g. a whole day of classes.
+
+    Expects a JSON body ``{"routes": [...]}`` where each route is either
+    ``{"start": ..., "destination": ..., "disabled": ...}`` or a
+    ``[start, destination, disabled]`` list (``disabled`` is optional), and optional
+    ``path_format``/``tolerance`` fields applied to every route.
+    Returns ``{"routes": [...]}`` with the same data as ``/directions/indoor`` for each
+    route, in order (``{}`` when there is no route, ``{"error": ...}`` for unknown
+    rooms and routes that can't be drawn).
+    """
+    routes = request.data.get("routes") if isinstance(request.data, dict) else None
+    if not isinstance(routes, list):
+        return JsonResponse({"error": "Expected a list of routes"}, status=400)
+    if len(routes) > INDOOR_DIRECTIONS_BATCH_MAX:
+        return JsonResponse(
+            {"error": f"At most {INDOOR_DIRECTIONS_BATCH_MAX} routes per request"},
+            status=400,
+        )
+
+    try:
+        routes = [parse_batch_route(route) for route in routes]
+        path_format, tolerance = parse_path_options(request.data)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    results = get_indoor_directions_batch(routes, path_format, tolerance)
+    return JsonResponse({"routes": [data or {} for data in results]})
+
+
+@api_view(["GET"])
+@require_http_methods(["GET"])
+def get_nearest_facilities(request):
+    """
+    The k nodes of a type (``water-closet``, ``elevator``, ``exit``...) closest to a
+    room, with the distance and directions data to each of them.
+    """
+    start = request.GET.get("start")
+    node_type = request.GET.get("type")
+    disabled = request.GET.get("disabled")
+    if not start or not node_type:
+        return JsonResponse({"error": "Missing start or type parameter"}, status=400)
+    try:
+        k = int(request.GET.get("k", 1))
+        if not 1 <= k <= INDOOR_NEAREST_MAX_RESULTS:
+            raise ValueError(f"k must be between 1 and {INDOOR_NEAREST_MAX_RESULTS}")
+        path_format, tolerance = parse_path_options(request.GET)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    context = IndoorRoutingContext(
+        disabled, path_format=path_format, tolerance=tolerance
+    )
+    try:
+        results = get_nearest_facilities_data(start, node_type, k, disabled, context)
+    except RoomNotFoundError as e:
+        return JsonResponse({"error": str(e)}, status=404)
+    except IndoorMapRenderError as e:
+        return JsonResponse({"error": str(e)}, status=422)
+    if results is None:
+        return JsonResponse({"error": f"Unknown node type '{node_type}'"}, status=400)
+    return JsonResponse({"results": results})
+
+
+def parse_batch_route(route):
+    if isinstance(route, dict):
+        route = (route.get("start"), route.get("destination"), route.get("disabled"))
+    elif isinstance(route, list) and len(route) in (2, 3):
+        route = (*route, None) if len(route) == 2 else tuple(route)
+    else:
+        raise ValueError(f"Invalid route {route!r}")
+
+    start, destination, disabled = route
+    if not isinstance(start, str) or not isinstance(destination, str):
+        raise ValueError(f"Missing start or destination in route {list(route)!r}")
+    return start, destination, disabled or False
+
+
+# "path_format" is "svg" (default) or "array", "tolerance" enables Douglas-Peucker
+# (not "format", DRF uses it to pick a renderer)
+def parse_path_options(params):
+    path_format = params.get("path_format") or "svg"
+    if path_format not in PATH_FORMATS:
+        raise ValueError(f"path_format must be one of {', '.join(PATH_FORMATS)}")
+    try:
+        tolerance = float(params.get("tolerance") or 0)
+    except (TypeError, ValueError):
+        raise ValueError("tolerance must be a number")
+    if not 0 <= tolerance < float("inf"):
+        raise ValueError("tolerance must be a positive number")
+    return path_format, tolerance
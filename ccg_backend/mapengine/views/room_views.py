@@ -0,0 +1,36 @@
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+from rest_framework.decorators import api_view
+
+from ..utils.indoor_map_registry import indoor_map_registry
+from ..utils.indoor_room_search import MAX_RESULTS
+
+
+@api_view(["GET"])
+@require_http_methods(["GET"])
+def search_rooms(request):
+    query = request.GET.get("q", "")
+    try:
+        limit = int(request.GET.get("limit", 10))
+    except ValueError:
+        return JsonResponse({"error": "limit must be an integer"}, status=400)
+    if not 1 <= limit <= MAX_RESULTS:
+        return JsonResponse(
+            {"error": f"limit must be between 1 and {MAX_RESULTS}"}, status=400
+        )
+
+    matches = indoor_map_registry.snapshot().room_search.search(query, limit)
+    return JsonResponse(
+        {
+            "results": [
+                {
+                    "id": match.id,
+                    "type": match.type,
+                    "building": match.building,
+                    "floor": match.floor,
+                    "pin": match.pin,
+                }
+                for match in matches
+            ]
+        }
+    )
@@ -9,6 +9,7 @@ if "%CONDA_DEFAULT_ENV%"=="myenv" (
     python manage.py migrate
 
     python manage.py loaddata campus_buildings.json departments.json services.json routes.json shuttle_stops.json shuttle_schedule.json points_of_interest.json
+    python manage.py compile_indoor_maps
 
     python manage.py runserver 0.0.0.0:8000
 ) else (